@@ -2,61 +2,147 @@
 from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.config_entries import ConfigEntry, current_entry
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.helpers.storage import Store
 
-from .api_worker import APIWorker
-from .const import CONFIG_CLIEND_SECRET, CONFIG_CLIENT_ID, DOMAIN, OPTION_ADJUSTED_DAYS
+from .api_client import pop_probe
+from .const import (
+    CONFIG_CLIEND_SECRET,
+    CONFIG_CLIENT_ID,
+    DATA_API_WORKER,
+    DATA_STOP_LISTENER,
+    DOMAIN,
+    OPTION_ADJUSTED_DAYS,
+    OPTION_HISTORY_BACKFILL,
+    STORE_VERSION,
+)
+from .entry_updater import EntryUpdater
+from .transitions import TransitionScheduler
+
+if TYPE_CHECKING:
+    from .api_worker import APIWorker
 
 PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.CALENDAR, Platform.SENSOR]
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class RTETempoData(NamedTuple):
+    """Objects shared by the platforms of a config entry."""
+
+    api_worker: APIWorker
+    transitions: TransitionScheduler
+    updater: EntryUpdater
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up rtetempo from a config entry."""
-    # Create the serial reader thread and start it
-    api_worker = APIWorker(
-        client_id=str(entry.data.get(CONFIG_CLIENT_ID)),
-        client_secret=str(entry.data.get(CONFIG_CLIEND_SECRET)),
-        adjusted_days=bool(entry.options.get(OPTION_ADJUSTED_DAYS)),
-    )
-    api_worker.start()
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, api_worker.signalstop)
-    # Add options callback
-    entry.async_on_unload(entry.add_update_listener(update_listener))
-    entry.async_on_unload(lambda: api_worker.signalstop("config_entry_unload"))
-    # Add the serial reader to HA and initialize sensors
     try:
-        hass.data[DOMAIN][entry.entry_id] = api_worker
+        domain_data = hass.data[DOMAIN]
     except KeyError:
-        hass.data[DOMAIN] = {}
-        hass.data[DOMAIN][entry.entry_id] = api_worker
+        domain_data = hass.data[DOMAIN] = {}
+    # Get the API worker coordinator shared by all config entries (create it for the first one)
+    api_worker: APIWorker | None = domain_data.get(DATA_API_WORKER)
+    first_entry = api_worker is None
+    if api_worker is None:
+        # the worker and its heavy helpers are only loaded along the first config entry
+        from .api_worker import APIWorker  # pylint: disable=import-outside-toplevel
+
+        store = get_store(hass)
+        # out of the entry context: the coordinator would bind itself to this entry
+        # (polling preference, shut down on its unload) while all of them share it
+        context = current_entry.set(None)
+        try:
+            api_worker = APIWorker(hass=hass, store=store)
+        finally:
+            current_entry.reset(context)
+        domain_data[DATA_API_WORKER] = api_worker
+
+        # not bound to an entry: stopped by the last entry unload or Home Assistant stop
+        async def async_stop_worker(_: Event) -> None:
+            """Stop the API worker (cancel its timers and write its cache right away)."""
+            domain_data.pop(DATA_STOP_LISTENER, None)
+            await api_worker.async_shutdown()
+
+        domain_data[DATA_STOP_LISTENER] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, async_stop_worker
+        )
+        # Restore the local cache before starting it for entities to have a state right away
+        api_worker.load_cache(await store.async_load())
+    client_id = str(entry.data.get(CONFIG_CLIENT_ID))
+    api_worker.add_credentials(
+        entry.entry_id,
+        client_id=client_id,
+        client_secret=str(entry.data.get(CONFIG_CLIEND_SECRET)),
+    )
+    # Options are published by the worker along the days (entities read both at once)
+    api_worker.set_adjusted_days(
+        entry.entry_id, bool(entry.options.get(OPTION_ADJUSTED_DAYS))
+    )
+    api_worker.set_history_backfill(
+        entry.entry_id, bool(entry.options.get(OPTION_HISTORY_BACKFILL))
+    )
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+    # A new entry validated by the config flow brings a fresh token and days: no need to fetch them again
+    probe = pop_probe(hass, client_id)
+    if first_entry and not (probe and api_worker.adopt_probe(entry.entry_id, probe)):
+        hass.async_create_background_task(
+            api_worker.async_refresh(), f"{DOMAIN}_first_refresh"
+        )
+    # Create the scheduler of time derived entities
+    transitions = TransitionScheduler(hass)
+    entry.async_on_unload(transitions.async_shutdown)
+    # Create the update pipeline of the entities
+    updater = EntryUpdater(api_worker, transitions, entry.entry_id)
+    entry.async_on_unload(updater.async_shutdown)
+    # Register the entry objects and initialize sensors
+    domain_data[entry.entry_id] = RTETempoData(
+        api_worker=api_worker, transitions=transitions, updater=updater
+    )
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     # main init done
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Publish the new options of a config entry and update its entities."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    entry_data.api_worker.set_adjusted_days(
+        entry.entry_id, bool(entry.options.get(OPTION_ADJUSTED_DAYS))
+    )
+    entry_data.api_worker.set_history_backfill(
+        entry.entry_id, bool(entry.options.get(OPTION_HISTORY_BACKFILL))
+    )
+    entry_data.updater.async_update()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         # Remove the related entry
-        hass.data[DOMAIN].pop(entry.entry_id)
+        api_worker = hass.data[DOMAIN].pop(entry.entry_id).api_worker
+        # Stop the shared API worker with the last entry using it
+        if api_worker.remove_credentials(entry.entry_id) == 0:
+            hass.data[DOMAIN].pop(DATA_API_WORKER)
+            if unsub_stop := hass.data[DOMAIN].pop(DATA_STOP_LISTENER, None):
+                unsub_stop()
+            await api_worker.async_shutdown()
     return unload_ok
 
 
-async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """Handle options update."""
-    # Retrieved the API Worker for this config entry
-    try:
-        serial_reader = hass.data[DOMAIN][entry.entry_id]
-    except KeyError:
-        _LOGGER.error(
-            "Can not update options for %s: failed to get the API Worker object",
-            entry.title,
-        )
-        return
-    # Update its options
-    serial_reader.update_options(entry.options.get(OPTION_ADJUSTED_DAYS))
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the local cache once the last config entry is deleted."""
+    if not any(
+        other.entry_id != entry.entry_id
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        await get_store(hass).async_remove()
+
+
+def get_store(hass: HomeAssistant) -> Store[dict[str, Any]]:
+    """Get the local store shared by all config entries."""
+    return Store[dict[str, Any]](hass, STORE_VERSION, DOMAIN)
@@ -0,0 +1,274 @@
+"""RTE Tempo API client: plain requests and error handling, without the worker machinery."""
+from __future__ import annotations
+
+import datetime
+from email.utils import parsedate_to_datetime
+import json
+import logging
+from typing import Any, NamedTuple
+
+import aiohttp
+from aiohttp import hdrs
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    API_DATE_FORMAT,
+    API_FUTURE_DAYS,
+    API_HISTORY_DAYS,
+    API_KEY_ERROR,
+    API_KEY_ERROR_DESC,
+    API_PROBE_MAX_AGE,
+    API_REQ_TIMEOUT,
+    API_TEMPO_ENDPOINT,
+    API_TOKEN_KEY_ACCESS,
+    DATA_PROBES,
+    DOMAIN,
+    FRANCE_TZ,
+    USER_AGENT,
+)
+from .token_manager import async_fetch_token
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class APIResponse(NamedTuple):
+    """Represents a fully read API HTTP response."""
+
+    status_code: int
+    text: str
+    retry_after: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def json(self) -> Any:
+        """Decode the JSON body of the response."""
+        return json.loads(self.text)
+
+
+class ProbeResult(NamedTuple):
+    """Represents the access token and the days fetched while validating the credentials."""
+
+    token: dict[str, Any]
+    response: APIResponse
+    fetched_at: datetime.datetime
+
+
+def fetch_window(
+    reftime: datetime.datetime, start_before_days: int, end_after_days: int
+) -> tuple[datetime.datetime, datetime.datetime]:
+    """Return the start and end datetimes of a fetch around a reference time."""
+    # nullify time but keep date and tz
+    localized_date = datetime.datetime.combine(
+        reftime.date(), datetime.time(tzinfo=FRANCE_TZ)
+    )
+    return (
+        localized_date - datetime.timedelta(days=start_before_days),
+        localized_date + datetime.timedelta(days=end_after_days),
+    )
+
+
+async def async_get_tempo_data(
+    session: aiohttp.ClientSession,
+    token: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> APIResponse:
+    """Fetch the tempo days between two datetimes (conditionally if the validators of the last payload are given)."""
+    # prepare params
+    start_str = start.strftime(API_DATE_FORMAT)
+    end_str = end.strftime(API_DATE_FORMAT)
+    params = {
+        "start_date": start_str[:-2] + ":" + start_str[-2:],
+        "end_date": end_str[:-2] + ":" + end_str[-2:],
+    }
+    headers = {
+        "Accept": "application/json",
+        "Authorization": f"Bearer {token}",
+        "User-Agent": USER_AGENT,
+    }
+    if etag:
+        headers[hdrs.IF_NONE_MATCH] = etag
+    if last_modified:
+        headers[hdrs.IF_MODIFIED_SINCE] = last_modified
+    _LOGGER.debug(
+        "Calling %s with start_date as '%s' and end_date as '%s'",
+        API_TEMPO_ENDPOINT,
+        start_str,
+        end_str,
+    )
+    # fetch data
+    async with session.get(
+        API_TEMPO_ENDPOINT,
+        params=params,
+        timeout=aiohttp.ClientTimeout(total=API_REQ_TIMEOUT),
+        headers=headers,
+    ) as response:
+        return APIResponse(
+            response.status,
+            await response.text(),
+            response.headers.get(hdrs.RETRY_AFTER),
+            response.headers.get(hdrs.ETAG),
+            response.headers.get(hdrs.LAST_MODIFIED),
+        )
+
+
+async def async_application_tester(
+    hass: HomeAssistant, client_id: str, client_secret: str
+) -> ProbeResult:
+    """Test application credentials against the API, keeping the token and the days fetched for the worker."""
+    session = async_get_clientsession(hass)
+    token = await async_fetch_token(
+        session, aiohttp.BasicAuth(client_id, client_secret)
+    )
+    # fetch the full reconciliation window: the new worker starts from it instead of fetching it again
+    fetched_at = datetime.datetime.now(FRANCE_TZ)
+    start, end = fetch_window(fetched_at, API_HISTORY_DAYS, API_FUTURE_DAYS)
+    response = await async_get_tempo_data(
+        session, token[API_TOKEN_KEY_ACCESS], start, end
+    )
+    handle_api_errors(response)
+    return ProbeResult(token=token, response=response, fetched_at=fetched_at)
+
+
+@callback
+def store_probe(hass: HomeAssistant, client_id: str, probe: ProbeResult) -> None:
+    """Keep the result of a config flow probe for the config entry about to be created."""
+    hass.data.setdefault(DOMAIN, {}).setdefault(DATA_PROBES, {})[client_id] = probe
+
+
+@callback
+def pop_probe(hass: HomeAssistant, client_id: str) -> ProbeResult | None:
+    """Get the result of the config flow probe of a new config entry, if recent enough."""
+    probe: ProbeResult | None = (
+        hass.data.get(DOMAIN, {}).get(DATA_PROBES, {}).pop(client_id, None)
+    )
+    if probe is None or datetime.datetime.now(
+        FRANCE_TZ
+    ) - probe.fetched_at > datetime.timedelta(minutes=API_PROBE_MAX_AGE):
+        return None
+    return probe
+
+
+def handle_api_errors(response: APIResponse):
+    """Use to handle all errors described in the API documentation."""
+    if response.status_code == 304:
+        # conditional request: the last payload of the caller is still valid
+        return
+    if response.status_code == 400:
+        try:
+            payload = response.json()
+            raise BadRequest(
+                response.status_code,
+                f"{payload[API_KEY_ERROR]}: {payload[API_KEY_ERROR_DESC]}",
+            )
+        except json.JSONDecodeError as exc:
+            raise BadRequest(
+                response.status_code, f"Failed to decode JSON payload: {response.text}"
+            ) from exc
+        except KeyError as exc:
+            raise BadRequest(
+                response.status_code,
+                f"Failed to decode access JSON error payload: {response.text}",
+            ) from exc
+    elif response.status_code == 401:
+        raise BadRequest(response.status_code, "Unauthorized")
+    elif response.status_code == 403:
+        raise BadRequest(response.status_code, "Forbidden")
+    elif response.status_code == 404:
+        raise BadRequest(response.status_code, "Not Found")
+    elif response.status_code == 408:
+        raise BadRequest(response.status_code, "Request Time-out")
+    elif response.status_code == 413:
+        raise BadRequest(response.status_code, "Request Entity Too Large")
+    elif response.status_code == 414:
+        raise BadRequest(response.status_code, "Request-URI Too Long")
+    elif response.status_code == 429:
+        raise BadRequest(
+            response.status_code,
+            "Too Many Requests",
+            parse_retry_after(response.retry_after),
+        )
+    elif response.status_code == 500:
+        try:
+            payload = response.json()
+            raise ServerError(
+                response.status_code,
+                f"{payload[API_KEY_ERROR]}: {payload[API_KEY_ERROR_DESC]}",
+            )
+        except json.JSONDecodeError as exc:
+            raise ServerError(
+                response.status_code, f"Failed to decode JSON payload: {response.text}"
+            ) from exc
+        except KeyError as exc:
+            raise ServerError(
+                response.status_code,
+                f"Failed to decode access JSON error payload: {response.text}",
+            ) from exc
+    elif response.status_code == 503:
+        raise ServerError(
+            response.status_code,
+            "Service Unavailable",
+            parse_retry_after(response.retry_after),
+        )
+    elif response.status_code == 509:
+        raise ServerError(response.status_code, "Bandwidth Limit Exceeded")
+    elif response.status_code != 200:
+        raise UnexpectedError(
+            response.status_code, f"Unexpected HTTP code: {response.text}"
+        )
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (a delay in seconds or an HTTP date) as a delay in seconds."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        _LOGGER.debug("Ignoring invalid Retry-After header: %s", value)
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max((retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+
+class BadRequest(Exception):
+    """Represents a API HTTP 4xx error."""
+
+    def __init__(
+        self, code: int, message: str, retry_after: float | None = None
+    ) -> None:
+        """Initialize the BadRequest exception (retry_after is the delay asked by the API in seconds, if any)."""
+        self.code = code
+        self.retry_after = retry_after
+        super().__init__(f"HTTP code {code}: {message}")
+
+
+class ServerError(Exception):
+    """Represents a API HTTP 5xx error."""
+
+    def __init__(
+        self, code: int, message: str, retry_after: float | None = None
+    ) -> None:
+        """Initialize the ServerError exception (retry_after is the delay asked by the API in seconds, if any)."""
+        self.code = code
+        self.retry_after = retry_after
+        super().__init__(f"HTTP code {code}: {message}")
+
+
+class UnexpectedError(Exception):
+    """Represents any HTTP error not described by the API documentation."""
+
+    def __init__(self, code: int, message: str) -> None:
+        """Initialize the UnexpectedError exception."""
+        self.code = code
+        super().__init__(f"HTTP code {code}: {message}")
+
@@ -1,494 +1,729 @@
 """API worker for RTE Tempo Calendar."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Callable
 import datetime
+from functools import lru_cache, partial
+import hashlib
 import logging
-import random
-import threading
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
-from oauthlib.oauth2 import BackendApplicationClient, TokenExpiredError
-from oauthlib.oauth2.rfc6749.errors import OAuth2Error
-import requests
-from requests.auth import HTTPBasicAuth
-from requests_oauthlib import OAuth2Session
+import aiohttp
 
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import (
-    API_DATE_FORMAT,
-    API_KEY_END,
-    API_KEY_ERROR,
-    API_KEY_ERROR_DESC,
+    API_ANNOUNCEMENT_WINDOW_DAYS,
+    API_CONFIRMATION_WINDOW_DAYS,
+    API_FUTURE_DAYS,
+    API_HISTORY_DAYS,
+    API_HISTORY_START,
+    API_HOT_WINDOW_DAYS,
     API_KEY_RESULTS,
     API_KEY_START,
     API_KEY_UPDATED,
     API_KEY_VALUE,
     API_KEY_VALUES,
-    API_REQ_TIMEOUT,
-    API_TEMPO_ENDPOINT,
-    API_TOKEN_ENDPOINT,
+    API_PARSE_CACHE_SIZE,
+    API_RECONCILIATION_HOURS,
     API_VALUE_BLUE,
-    CONFIRM_CHECK,
-    CONFIRM_HOUR,
-    CONFIRM_MIN,
     FRANCE_TZ,
-    HOUR_OF_CHANGE,
-    USER_AGENT,
+    STORE_KEY_DATE,
+    STORE_KEY_DAYS,
+    STORE_KEY_HISTORY_START,
+    STORE_KEY_LAST_FETCH,
+    STORE_KEY_LAST_RECONCILIATION,
+    STORE_KEY_TOKEN,
+    STORE_KEY_UPDATED,
+    STORE_KEY_VALUE,
+    STORE_SAVE_DELAY,
 )
+from .api_client import (
+    APIResponse,
+    BadRequest,
+    ProbeResult,
+    ServerError,
+    UnexpectedError,
+    async_get_tempo_data,
+    fetch_window,
+    handle_api_errors,
+)
+from .fetch_scheduler import (
+    FETCH_REASON_ANNOUNCEMENT,
+    FETCH_REASON_ANNOUNCEMENT_WINDOW,
+    FETCH_REASON_CIRCUIT_OPEN,
+    FETCH_REASON_CONFIRMATION,
+    FETCH_REASON_DAY_CHANGE,
+    FETCH_REASON_RETRY,
+    FetchPlan,
+    FetchScheduler,
+    delay_until,
+)
+from .history_backfill import HistoryBackfill
+from .retry_policy import ErrorKind, RetryPolicy, classify_error
+from .tempo_days import (
+    TempoDaysDiff,
+    TempoDaysStore,
+    TempoSnapshot,
+    tempo_date,
+)
+from .token_manager import OAuthError, TokenManager
 
 _LOGGER = logging.getLogger(__name__)
 
+# reasons of the fetches polling for the next day color announcement
+ANNOUNCEMENT_REASONS = (
+    FETCH_REASON_DAY_CHANGE,
+    FETCH_REASON_ANNOUNCEMENT,
+    FETCH_REASON_ANNOUNCEMENT_WINDOW,
+)
 
-class TempoDay(NamedTuple):
-    """Represents a tempo day."""
 
-    Start: datetime.datetime | datetime.date
-    End: datetime.datetime | datetime.date
-    Value: str
-    Updated: datetime.datetime
+# https://data.rte-france.com/documents/20182/224298/FR_GU_API_Tempo_Like_Supply_Contract_v01.02.pdf
 
 
-# https://data.rte-france.com/documents/20182/224298/FR_GU_API_Tempo_Like_Supply_Contract_v01.02.pdf
+class FetchedWindow(NamedTuple):
+    """Represents the last payload merged for a fetch window and its HTTP validators."""
+
+    fingerprint: bytes
+    etag: str | None
+    last_modified: str | None
 
 
-class APIWorker(threading.Thread):
-    """API Worker is an autonomous thread querying, parsing an caching the RTE Tempo calendar API in an optimal way."""
+class APIWorker(DataUpdateCoordinator[int]):
+    """API Worker is an asyncio coordinator querying, parsing an caching the RTE Tempo calendar API in an optimal way.
 
-    def __init__(self, client_id: str, client_secret: str, adjusted_days: bool) -> None:
-        """Initialize the API Worker thread."""
-        # Thread
-        self._stopevent = threading.Event()
+    A single worker is shared by all the config entries: the Tempo calendar is national.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        store: Store[dict[str, Any]],
+        clock: Callable[[], datetime.datetime] = partial(
+            datetime.datetime.now, FRANCE_TZ
+        ),
+        scheduler: FetchScheduler | None = None,
+    ) -> None:
+        """Initialize the API Worker coordinator (shared by all the config entries).
+
+        The clock and the fetch scheduler can be replaced to simulate the polling strategy.
+        """
+        self._clock = clock
         # OAuth
-        self._auth = HTTPBasicAuth(client_id, client_secret)
-        self._oauth = OAuth2Session(
-            client=BackendApplicationClient(client_id=client_id)
+        self._session = async_get_clientsession(hass)
+        self._tokens = TokenManager(
+            hass, self._session, lambda: self._clock().timestamp()
         )
+        self._tokens.on_renewal = self._save_cache
         # Worker
-        self._tempo_days_time: list[TempoDay] = []
-        self._tempo_days_date: list[TempoDay] = []
-        self.adjusted_days: bool = adjusted_days
-        # Init parent thread class
-        super().__init__(name="RTE Tempo API Worker")
-
-    def get_calendar_days(self) -> list[TempoDay]:
-        """Get the tempo days suited for calendar."""
-        if self.adjusted_days:
-            return self._tempo_days_time
-        return self._tempo_days_date
-
-    def get_adjusted_days(self) -> list[TempoDay]:
-        """Get the tempo adjusted days."""
-        return self._tempo_days_time
-
-    def get_regular_days(self) -> list[TempoDay]:
-        """Get the tempo adjusted days."""
-        return self._tempo_days_date
-
-    def run(self):
-        """Execute thread payload."""
-        _LOGGER.info("Starting thread")
-        stop = False
-        while not stop:
-            # First auth
-            if self._oauth.token == {}:
-                self._get_access_token()
-            # Fetch data
-            localized_now = datetime.datetime.now(FRANCE_TZ)
-            end = self._update_tempo_days(
-                localized_now, start_before_days=364, end_after_days=2
-            )
-            # Wait depending on last result fetched
-            wait_time = self._compute_wait_time(localized_now, end)
-            stop = self._stopevent.wait(float(wait_time.seconds))
-        # stopping thread
-        _LOGGER.info("Thread stopped")
+        self._store = store
+        # data read by the entities: only replaced as a whole, never modified
+        self._snapshot = TempoSnapshot(
+            days=TempoDaysStore(),
+            generation=0,
+            fetched_at=None,
+            cycle=None,
+            adjusted_entries=frozenset(),
+        )
+        self._last_reconciliation: datetime.datetime | None = None
+        # History older than the retention window: entries asking for it and the
+        # day from which it is complete (None if not backfilled)
+        self._backfill_entries: set[str] = set()
+        self._history_start: datetime.date | None = None
+        self._backfill = HistoryBackfill(hass, self, clock)
+        # last payload of each fetch window still matching the cache
+        self._fetched_windows: dict[
+            tuple[datetime.date, datetime.date], FetchedWindow
+        ] = {}
+        # disabled if the API answers a conditional request in an unexpected way
+        self._conditional_requests = True
+        # Failures handling: error of the last fetch and planning of the retries
+        self._last_error: Exception | None = None
+        self._retry = RetryPolicy()
+        # Next fetch planning
+        self._scheduler = scheduler or FetchScheduler()
+        # Set once days are available (local cache, config flow probe or first fetch)
+        self._first_data = asyncio.Event()
+        # Init parent coordinator class (update interval is computed after each fetch)
+        # listeners are only notified when the data generation changes
+        super().__init__(hass, _LOGGER, name="RTE Tempo API Worker", always_update=False)
+        self.data = self._snapshot.generation
+
+    @callback
+    def add_credentials(self, entry_id: str, client_id: str, client_secret: str):
+        """Register the application credentials of a config entry."""
+        self._tokens.add_credentials(entry_id, client_id, client_secret)
+        if self._retry.circuit_open:
+            # new credentials to try: do not wait for the circuit breaker pause to end
+            self._retry.reset()
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def remove_credentials(self, entry_id: str) -> int:
+        """Unregister the credentials of a config entry and return the number of entries still using the worker."""
+        self.set_adjusted_days(entry_id, False)
+        self.set_history_backfill(entry_id, False)
+        return self._tokens.remove_credentials(entry_id)
 
     @callback
-    def signalstop(self, event):
-        """Activate the stop flag in order to stop the thread from within."""
+    def set_adjusted_days(self, entry_id: str, adjusted: bool) -> None:
+        """Publish the adjusted days option of a config entry along the days (same data generation)."""
+        adjusted_entries = self._snapshot.adjusted_entries
+        if adjusted:
+            adjusted_entries = adjusted_entries | {entry_id}
+        else:
+            adjusted_entries = adjusted_entries - {entry_id}
+        self._snapshot = self._snapshot._replace(adjusted_entries=adjusted_entries)
+
+    @callback
+    def set_history_backfill(self, entry_id: str, enabled: bool) -> None:
+        """Register the history backfill option of a config entry: the history is kept while one of them asks for it."""
+        if enabled:
+            self._backfill_entries.add(entry_id)
+            if self._scheduler.next_fetch is not None:
+                # otherwise started by the first successful fetch
+                self._backfill.async_start()
+            return
+        self._backfill_entries.discard(entry_id)
+        if not self._backfill_entries:
+            # days older than the retention window are evicted by the next fetch
+            # (the history is kept in the cache until then, for a reload)
+            self._backfill.async_stop()
+
+    def history_boundary(self) -> datetime.date:
+        """Return the day from which the history is complete (the retention window start if not backfilled)."""
+        retention_start = fetch_window(self._clock(), API_HISTORY_DAYS, 0)[0].date()
+        if self._history_start is None:
+            return retention_start
+        return min(self._history_start, retention_start)
+
+    async def async_shutdown(self) -> None:
+        """Stop the worker and write the days cache on the local store right away."""
+        await super().async_shutdown()
+        self._backfill.async_stop()
+        self._tokens.async_shutdown()
+        if (
+            self._last_reconciliation is not None
+            and self._snapshot.fetched_at is not None
+        ):
+            await self._store.async_save(self._cache_data())
+
+    @property
+    def snapshot(self) -> TempoSnapshot:
+        """Return the current snapshot of the data (read it once per update for a consistent view)."""
+        return self._snapshot
+
+    @property
+    def generation(self) -> int:
+        """Return the generation of the data currently held, bumped on each change."""
+        return self._snapshot.generation
+
+    async def async_wait_first_data(self, timeout: float) -> bool:
+        """Wait at most timeout seconds for the first days to be available (or the first fetch to have failed)."""
+        try:
+            await asyncio.wait_for(self._first_data.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @property
+    def scheduler(self) -> FetchScheduler:
+        """Return the fetch scheduler (next planned fetch and its reason)."""
+        return self._scheduler
+
+    @property
+    def retry(self) -> RetryPolicy:
+        """Return the retry policy (consecutive failures and circuit breaker state)."""
+        return self._retry
+
+    @property
+    def tokens(self) -> TokenManager:
+        """Return the access token manager (token age and refresh count)."""
+        return self._tokens
+
+    @property
+    def tempo_days(self) -> TempoDaysStore:
+        """Return the tempo days store of the current snapshot."""
+        return self._snapshot.days
+
+    def load_cache(self, data: dict[str, Any] | None):
+        """Restore the days cache from the local store (must be called before the first refresh)."""
+        if not data:
+            _LOGGER.debug("No local cache found, waiting for first API call")
+            return
+        self._tokens.restore(data.get(STORE_KEY_TOKEN))
+        try:
+            tempo_days = TempoDaysStore()
+            for stored_day in data[STORE_KEY_DAYS]:
+                tempo_days.set_day(
+                    datetime.date.fromisoformat(stored_day[STORE_KEY_DATE]),
+                    stored_day[STORE_KEY_VALUE],
+                    datetime.datetime.fromisoformat(stored_day[STORE_KEY_UPDATED]),
+                )
+            last_reconciliation = datetime.datetime.fromisoformat(
+                data[STORE_KEY_LAST_RECONCILIATION]
+            )
+            last_fetch = datetime.datetime.fromisoformat(data[STORE_KEY_LAST_FETCH])
+            history_start = None
+            if data.get(STORE_KEY_HISTORY_START):
+                history_start = datetime.date.fromisoformat(
+                    data[STORE_KEY_HISTORY_START]
+                )
+        except (KeyError, TypeError, ValueError) as exc:
+            _LOGGER.warning("Local cache is invalid, discarding it: %s", repr(exc))
+            return
+        self._last_reconciliation = last_reconciliation
+        self._history_start = history_start
+        self._publish(tempo_days, last_fetch, None)
+        self.data = self._snapshot.generation
+        if len(tempo_days) > 0:
+            self._first_data.set()
         _LOGGER.info(
-            "Stopping RTE Tempo Calendar API Worker serial thread reader (received %s)",
-            event,
+            "Restored %d days from local cache (last fetch at %s)",
+            len(tempo_days),
+            last_fetch,
         )
-        self._stopevent.set()
-
-    def update_options(self, adjusted_days: bool):
-        """Setter to update serial reader options."""
-        _LOGGER.debug("New adjusted days option value: %s", adjusted_days)
-        self.adjusted_days = adjusted_days
-
-    def _compute_wait_time(
-        self, localized_now: datetime.datetime, data_end: datetime.datetime | None
-    ) -> datetime.timedelta:
-        if not data_end:
-            # something went wrong, retry in 10 minutes
-            return datetime.timedelta(minutes=10)
-        # else compute appropriate wait time depending on date_end
-        localized_today = datetime.datetime.combine(
-            localized_now.date(), datetime.time(tzinfo=FRANCE_TZ)
+
+    def adopt_probe(self, entry_id: str, probe: ProbeResult) -> bool:
+        """Use the token and the days fetched by the config flow as the first refresh."""
+        fetched_at = self._snapshot.fetched_at
+        if fetched_at is not None and fetched_at >= probe.fetched_at:
+            return False
+        self._tokens.adopt(entry_id, probe.token)
+        end = self._merge_tempo_days(
+            probe.response,
+            probe.fetched_at,
+            fetch_window(probe.fetched_at, API_HISTORY_DAYS, API_FUTURE_DAYS),
+            reconcile=True,
+            known=None,
         )
-        diff = data_end - localized_today
-        _LOGGER.debug(
-            "Computing wait time based on data_end(%s) - today(%s) = diff(%s)",
-            data_end,
-            localized_now,
-            diff,
+        if end is None:
+            return False
+        _LOGGER.info(
+            "Adopted %d days fetched by the config flow", len(self._snapshot.days)
+        )
+        self._apply_plan(
+            self._scheduler.plan(probe.fetched_at, end, self._newest_day_updated())
         )
-        if diff.days == 2:
-            # we have next day color, check if we need to confirm or wait until tomorrow
-            ref_confirmation = datetime.datetime(
-                year=localized_now.year,
-                month=localized_now.month,
-                day=localized_now.day,
-                hour=CONFIRM_HOUR,
-                minute=CONFIRM_MIN,
-                tzinfo=localized_now.tzinfo,
+        self.data = self._snapshot.generation
+        self._retry.reset()
+        self._first_data.set()
+        if self._backfill_entries:
+            self._backfill.async_start()
+        return True
+
+    async def _async_update_data(self) -> int:
+        """Fetch data and plan the next refresh depending on the result."""
+        # Fetch data: full year on first run and periodically, a narrow window
+        # depending on the reason of the fetch otherwise
+        localized_now = self._clock()
+        plan = self._scheduler.next_fetch
+        reason = plan.reason if plan else None
+        announcement = reason in ANNOUNCEMENT_REASONS
+        if self._need_reconciliation(localized_now, deferrable=announcement):
+            end = await self._async_update_tempo_days(
+                localized_now,
+                start_before_days=API_HISTORY_DAYS,
+                end_after_days=API_FUTURE_DAYS,
+                reconcile=True,
             )
-            if localized_now > ref_confirmation:
-                # we are past the confirmation hour, wait until tomorrow
-                tomorrow = localized_now + datetime.timedelta(days=1)
-                next_call = datetime.datetime(
-                    year=tomorrow.year,
-                    month=tomorrow.month,
-                    day=tomorrow.day,
-                    hour=HOUR_OF_CHANGE,
-                    tzinfo=localized_now.tzinfo,
-                )
-                wait_time = next_call - localized_now
-                wait_time = datetime.timedelta(
-                    seconds=random.randrange(wait_time.seconds, wait_time.seconds + 900)
-                )
-                _LOGGER.info(
-                    "We got next day color, waiting until tomorrow to get futur next day color (wait time is %s)",
-                    wait_time,
-                )
-            else:
-                # we are not past the confirmation hour yet, wait until 2nd confirmation call
-                tomorrow = localized_now + datetime.timedelta(days=1)
-                next_call = datetime.datetime(
-                    year=tomorrow.year,
-                    month=tomorrow.month,
-                    day=tomorrow.day,
-                    hour=CONFIRM_CHECK,
-                    tzinfo=localized_now.tzinfo,
-                )
-                wait_time = next_call - localized_now
-                wait_time = datetime.timedelta(
-                    seconds=random.randrange(
-                        wait_time.seconds - 900, wait_time.seconds + 900
-                    )  # +- 15min
-                )
-                _LOGGER.info(
-                    "We got next day color but we it is too early to be sure: waiting until confirmation hour to get futur next day color (wait time is %s)",
-                    wait_time,
-                )
-        elif diff.days == 1:
-            # we do not have next day color yet
-            if localized_now.hour < 6:
-                next_call = datetime.datetime(
-                    year=localized_now.year,
-                    month=localized_now.month,
-                    day=localized_now.day,
-                    hour=HOUR_OF_CHANGE,
-                    second=1,  # workaround for multiples requests spamming API at 5:59:59... because of imprecise wait time
-                    tzinfo=localized_now.tzinfo,
-                )
-                wait_time = next_call - localized_now
-                wait_time = datetime.timedelta(
-                    seconds=random.randrange(wait_time.seconds, wait_time.seconds + 900)
-                )
-                _LOGGER.debug(
-                    "We do not have next day color yet, waiting hour of day change at %sh (wait time is %s)",
-                    HOUR_OF_CHANGE,
-                    wait_time,
-                )
-            else:
-                wait_time = datetime.timedelta(minutes=30)
-                wait_time = datetime.timedelta(
-                    seconds=random.randrange(
-                        int(wait_time.seconds * 5 / 6), int(wait_time.seconds * 7 / 6)
-                    )
-                )
-                _LOGGER.debug(
-                    "We do not have next day color yet and hour of change (%sh) is already past, retrying soon (wait time is %s)",
-                    HOUR_OF_CHANGE,
-                    wait_time,
-                )
         else:
-            # weird, should not happen
-            wait_time = datetime.timedelta(hours=1)
-            wait_time = datetime.timedelta(
-                seconds=random.randrange(
-                    int(wait_time.seconds * 5 / 6), int(wait_time.seconds * 7 / 6)
-                )
-            )
-            _LOGGER.warning(
-                "Unexpected delta encountered between today and last result, waiting %s as fallback",
-                wait_time,
+            if reason == FETCH_REASON_CONFIRMATION:
+                # tomorrow only: the color to confirm
+                start_before_days = API_CONFIRMATION_WINDOW_DAYS
+            elif announcement:
+                # today and tomorrow: the color being announced
+                start_before_days = API_ANNOUNCEMENT_WINDOW_DAYS
+            else:
+                start_before_days = API_HOT_WINDOW_DAYS
+            end = await self._async_update_tempo_days(
+                localized_now,
+                start_before_days=start_before_days,
+                end_after_days=API_FUTURE_DAYS,
+                reconcile=False,
             )
-        # all good
-        return wait_time
-
-    def _get_access_token(self):
-        _LOGGER.debug("Requesting access token")
-        try:
-            headers = {
-                "User-Agent": USER_AGENT,
-            }
-            self._oauth.fetch_token(token_url=API_TOKEN_ENDPOINT, auth=self._auth, headers=headers)
-        except (
-            requests.exceptions.RequestException,
-            OAuth2Error,
-        ) as requests_exception:
-            _LOGGER.error("Fetching OAuth2 access token failed: %s", requests_exception)
-
-    def _get_tempo_data(
-        self, start: datetime.datetime, end: datetime.datetime
-    ) -> requests.Response:
-        # prepare params
-        start_str = start.strftime(API_DATE_FORMAT)
-        end_str = end.strftime(API_DATE_FORMAT)
-        params = {
-            "start_date": start_str[:-2] + ":" + start_str[-2:],
-            "end_date": end_str[:-2] + ":" + end_str[-2:],
-        }
-        headers = {
-            "Accept": "application/json",
-            "User-Agent": USER_AGENT,
-        }
-        _LOGGER.debug(
-            "Calling %s with start_date as '%s' and end_date as '%s'",
-            API_TEMPO_ENDPOINT,
-            start_str,
-            end_str,
-        )
-        # fetch data
-        try:
-            return self._oauth.get(
-                API_TEMPO_ENDPOINT,
-                params=params,
-                timeout=API_REQ_TIMEOUT,
-                headers=headers,
+        if end:
+            # Wait depending on last result fetched
+            self._retry.reset()
+            self._apply_plan(
+                self._scheduler.plan(localized_now, end, self._newest_day_updated())
             )
-        except TokenExpiredError:
-            self._get_access_token()
-            return self._oauth.get(
-                API_TEMPO_ENDPOINT,
-                params=params,
-                timeout=API_REQ_TIMEOUT,
-                headers=headers,
+            if self._backfill_entries:
+                # missing history, resumed after a restart or a failure
+                self._backfill.async_start()
+        else:
+            # Retry depending on the error (no token renewal: the retry fetches its own)
+            self._apply_plan(
+                self._scheduler.plan_in(
+                    localized_now,
+                    self._retry.record_failure(self._last_error),
+                    FETCH_REASON_CIRCUIT_OPEN
+                    if self._retry.circuit_open
+                    else FETCH_REASON_RETRY,
+                ),
+                renew_token=False,
             )
+        # Entities waiting for data are now better off with whatever we have
+        self._first_data.set()
+        return self._snapshot.generation
+
+    def _newest_day_updated(self) -> datetime.datetime | None:
+        """Return the publication time of the newest day with data."""
+        tempo_days = self._snapshot.days
+        newest_day = tempo_days.newest_day()
+        if newest_day is None:
+            return None
+        return tempo_days.tempo_day(newest_day, adjusted=False).Updated
+
+    def _apply_plan(self, plan: FetchPlan, renew_token: bool = True) -> None:
+        """Make the coordinator refresh at the planned deadline."""
+        # the coordinator only takes a delay: compute it at the last moment from the absolute deadline
+        self.update_interval = delay_until(self._clock(), plan.at)
+        if renew_token:
+            # Get the access token ready for the next fetch
+            self._tokens.schedule_renewal(plan.at)
+
+    def _need_reconciliation(
+        self, localized_now: datetime.datetime, deferrable: bool = False
+    ) -> bool:
+        """Check if the whole retention window must be fetched again (the periodic reconciliation can be deferred)."""
+        tempo_days = self._snapshot.days
+        if self._last_reconciliation is None or len(tempo_days) == 0:
+            return True
+        newest_day = tempo_days.newest_day()
+        if newest_day and newest_day < localized_now.date() - datetime.timedelta(
+            days=API_HOT_WINDOW_DAYS
+        ):
+            # cache is too old for the hot window to fill the gap
+            return True
+        if deferrable:
+            # announcement polls stay narrow: the next day change fetch will reconcile
+            return False
+        return localized_now - self._last_reconciliation >= datetime.timedelta(
+            hours=API_RECONCILIATION_HOURS
+        )
 
-    def _update_tempo_days(
-        self, reftime: datetime.datetime, start_before_days: int, end_after_days: int
+    async def _async_fetch_tempo_data(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        known: FetchedWindow | None = None,
+    ) -> APIResponse:
+        """Fetch the tempo days (conditionally if the last payload is known), trying each set of credentials once on authorization errors."""
+        attempts = self._tokens.nb_credentials
+        token_renewed = False
+        while True:
+            try:
+                token = await self._tokens.async_get_access_token()
+                response = await async_get_tempo_data(
+                    self._session,
+                    token,
+                    start,
+                    end,
+                    known.etag if known else None,
+                    known.last_modified if known else None,
+                )
+                handle_api_errors(response)
+                return response
+            except OAuthError as exc:
+                if classify_error(exc) is not ErrorKind.AUTH:
+                    # token endpoint unavailable: other credentials would not do better
+                    raise
+                attempts -= 1
+                if attempts <= 0 or not self._tokens.failover(exc):
+                    raise
+            except BadRequest as exc:
+                if exc.code not in (401, 403):
+                    raise
+                if exc.code == 401 and not token_renewed:
+                    # access token revoked before its expiration: get a new one
+                    self._tokens.invalidate()
+                    token_renewed = True
+                    continue
+                attempts -= 1
+                if attempts <= 0 or not self._tokens.failover(exc):
+                    raise
+
+    async def _async_update_tempo_days(
+        self,
+        reftime: datetime.datetime,
+        start_before_days: int,
+        end_after_days: int,
+        reconcile: bool,
     ) -> datetime.datetime | None:
-        # nullify time but keep date and tz
-        localized_date = datetime.datetime.combine(
-            reftime.date(), datetime.time(tzinfo=FRANCE_TZ)
-        )
-        # Get maximum calendar range from current time
-        start = localized_date - datetime.timedelta(days=start_before_days)
-        end = localized_date + datetime.timedelta(days=end_after_days)
+        start, end = fetch_window(reftime, start_before_days, end_after_days)
+        self._last_error = None
+        known = None
+        if self._conditional_requests:
+            known = self._fetched_windows.get((start.date(), end.date()))
         # Get data
         try:
-            response = self._get_tempo_data(start, end)
-            handle_api_errors(response)
-        except requests.exceptions.RequestException as requests_exception:
-            _LOGGER.error("API request failed: %s", requests_exception)
+            response = await self._async_fetch_tempo_data(start, end, known)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as http_exception:
+            _LOGGER.error("API request failed: %s", repr(http_exception))
+            self._last_error = http_exception
             return None
-        except OAuth2Error as oauth_execption:
+        except OAuthError as oauth_execption:
             _LOGGER.error("API request failed with OAuth2 error: %s", oauth_execption)
+            self._last_error = oauth_execption
             return None
         except (BadRequest, ServerError, UnexpectedError) as http_error:
             _LOGGER.error("API request failed with HTTP error code: %s", http_error)
+            self._last_error = http_error
             return None
-        try:
-            payload = response.json()
-        except requests.JSONDecodeError as exc:
-            _LOGGER.error(
-                "JSON parsing error on a HTTP 200 request (%s):\n%s", exc, response.text
-            )
-            return None
-        # Parse datetimes and fix time for start and end dates
-        tempo_days_time: list[TempoDay] = []
-        time_days_date: list[TempoDay] = []
-        for tempo_day in payload[API_KEY_RESULTS][API_KEY_VALUES]:
+        return self._merge_tempo_days(
+            response, reftime, (start, end), reconcile, known
+        )
+
+    def _merge_tempo_days(
+        self,
+        response: APIResponse,
+        reftime: datetime.datetime,
+        window: tuple[datetime.datetime, datetime.datetime],
+        reconcile: bool,
+        known: FetchedWindow | None,
+    ) -> datetime.datetime | None:
+        """Merge a response within the cache (known is the last payload of the window sent along the request, if any)."""
+        window_key = (window[0].date(), window[1].date())
+        # the published days are never modified: changes are made on a new store
+        tempo_days = self._snapshot.days
+        fingerprint = None
+        if response.status_code != 304:
+            fingerprint = hashlib.blake2b(
+                response.text.encode(), digest_size=16
+            ).digest()
+        if fingerprint is None:
+            if known is None:
+                # not a reply to our conditional request: stop sending them
+                _LOGGER.warning(
+                    "Unexpected HTTP 304 for window %s <> %s, disabling conditional requests",
+                    *window_key,
+                )
+                self._conditional_requests = False
+                self._last_error = UnexpectedError(304, "Not Modified")
+                return None
+            _LOGGER.debug("Payload not modified for window %s <> %s", *window_key)
+            changes = TempoDaysDiff([], [], [])
+        elif (
+            known is not None
+            and known.fingerprint == fingerprint
+            and self._fetched_windows.get(window_key) is known
+        ):
+            # same payload as the last fetch of this window (still matching the cache): nothing to parse
+            _LOGGER.debug("Payload unchanged for window %s <> %s", *window_key)
+            changes = TempoDaysDiff([], [], [])
+        else:
+            # Parse days (an invalid payload is a failed fetch: retried as such)
             try:
-                tempo_days_time.append(
-                    TempoDay(
-                        Start=adjust_tempo_time(
-                            parse_rte_api_datetime(tempo_day[API_KEY_START])
-                        ),
-                        End=adjust_tempo_time(
-                            parse_rte_api_datetime(tempo_day[API_KEY_END])
-                        ),
-                        Value=tempo_day[API_KEY_VALUE],
-                        Updated=parse_rte_api_datetime(tempo_day[API_KEY_UPDATED]),
-                    )
+                fetched_days = parse_rte_api_days(
+                    response.json()[API_KEY_RESULTS][API_KEY_VALUES]
                 )
-                time_days_date.append(
-                    TempoDay(
-                        Start=parse_rte_api_date(tempo_day[API_KEY_START]),
-                        End=parse_rte_api_date(tempo_day[API_KEY_END]),
-                        Value=tempo_day[API_KEY_VALUE],
-                        Updated=parse_rte_api_datetime(tempo_day[API_KEY_UPDATED]),
-                    )
+            except (KeyError, TypeError, ValueError) as exc:
+                _LOGGER.error(
+                    "Invalid payload on a HTTP %d request (%s):\n%s",
+                    response.status_code,
+                    repr(exc),
+                    response.text,
                 )
-            except KeyError as key_error:
-                if tempo_day[API_KEY_START] == "2022-12-28T00:00:00+01:00":
-                    # RTE has issued a warning concerning this day missing data on their API: its blue
-                    tempo_days_time.append(
-                        TempoDay(
-                            Start=adjust_tempo_time(
-                                parse_rte_api_datetime(tempo_day[API_KEY_START])
-                            ),
-                            End=adjust_tempo_time(
-                                parse_rte_api_datetime(tempo_day[API_KEY_END])
-                            ),
-                            Value=API_VALUE_BLUE,
-                            Updated=parse_rte_api_datetime(tempo_day[API_KEY_UPDATED]),
-                        )
-                    )
-                    time_days_date.append(
-                        TempoDay(
-                            Start=parse_rte_api_date(tempo_day[API_KEY_START]),
-                            End=parse_rte_api_date(tempo_day[API_KEY_END]),
-                            Value=API_VALUE_BLUE,
-                            Updated=parse_rte_api_datetime(tempo_day[API_KEY_UPDATED]),
-                        )
-                    )
-                else:
-                    _LOGGER.warning(
-                        "Following day failed to be processed with %s, skipping: %s",
-                        repr(key_error),
-                        tempo_day,
-                    )
-        # Save data in memory
-        self._tempo_days_time = tempo_days_time
-        self._tempo_days_date = time_days_date
+                self._last_error = exc
+                return None
+            # Merge fetched days within the cache
+            if reconcile:
+                # full window fetched: it is the new reference (catches corrections and removals),
+                # the history before it is kept
+                tempo_days = tempo_days.copy(before=window[0].date())
+                tempo_days.merge(fetched_days)
+                changes = tempo_days.diff(self._snapshot.days)
+            else:
+                tempo_days = tempo_days.copy()
+                changes = tempo_days.merge(fetched_days)
+            _LOGGER.debug(
+                "Merged %d days within the cache (%d days cached, reconciliation: %s)",
+                len(fetched_days),
+                len(tempo_days),
+                reconcile,
+            )
+            if not changes.empty():
+                # the payloads of the other windows may not match the cache anymore
+                self._fetched_windows.clear()
+        if fingerprint is not None:
+            # remember the payload and its validators for the next fetch of this window
+            self._fetched_windows[window_key] = FetchedWindow(
+                fingerprint, response.etag, response.last_modified
+            )
+        if reconcile:
+            self._last_reconciliation = reftime
+        # Evict days out of the retention window (unless the history is kept)
+        retention_start = reftime.date() - datetime.timedelta(days=API_HISTORY_DAYS)
+        oldest_day = tempo_days.oldest_day()
+        history_start = self._history_start
+        if not self._backfill_entries:
+            self._history_start = None
+            if oldest_day is not None and oldest_day < retention_start:
+                if tempo_days is self._snapshot.days:
+                    tempo_days = tempo_days.copy()
+                changes.Removed.extend(tempo_days.remove_before(retention_start))
+        # Publish the new snapshot: a new generation signals listeners if the days have changed
+        if not changes.empty():
+            _LOGGER.debug(
+                "Days changed: %d added, %d changed, %d removed",
+                len(changes.Added),
+                len(changes.Changed),
+                len(changes.Removed),
+            )
+        self._publish(tempo_days, reftime, changes)
+        # Save data on disk, only if it changed (not modified polls are the most common)
+        # the access token is saved on its renewal and the fetch time on shutdown
+        if not changes.empty() or reconcile or self._history_start != history_start:
+            self._save_cache()
         # Return results last end date in order for caller to compute next call time
-        if len(self._tempo_days_date) > 0:
-            newest_result = self._tempo_days_date[0].End
-            return datetime.datetime(
-                year=newest_result.year,
-                month=newest_result.month,
-                day=newest_result.day,
-                tzinfo=FRANCE_TZ,
+        newest_day = tempo_days.newest_day()
+        if newest_day:
+            return datetime.datetime.combine(
+                newest_day + datetime.timedelta(days=1),
+                datetime.time(tzinfo=FRANCE_TZ),
             )
         return None
 
+    async def async_fetch_days(
+        self, start: datetime.date, end: datetime.date
+    ) -> list[tuple[datetime.date, str, datetime.datetime]]:
+        """Fetch and parse the days between two dates (end excluded) without merging them (history backfill)."""
+        response = await self._async_fetch_tempo_data(
+            datetime.datetime.combine(start, datetime.time(tzinfo=FRANCE_TZ)),
+            datetime.datetime.combine(end, datetime.time(tzinfo=FRANCE_TZ)),
+        )
+        try:
+            return parse_rte_api_days(response.json()[API_KEY_RESULTS][API_KEY_VALUES])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise UnexpectedError(
+                response.status_code, f"invalid payload ({exc!r})"
+            ) from exc
 
-def adjust_tempo_time(date: datetime.datetime) -> datetime.datetime:
-    """RTE API give midnight to midnight date time while it actually goes from 6 to 6 AM."""
-    return date + datetime.timedelta(hours=HOUR_OF_CHANGE)
+    @callback
+    def merge_history(
+        self,
+        days: list[tuple[datetime.date, str, datetime.datetime]],
+        complete_from: datetime.date,
+    ) -> None:
+        """Merge the days of a history window and register the day from which the history is now complete."""
+        if not self._backfill_entries:
+            return
+        tempo_days = self._snapshot.days.copy()
+        # oldest first: the store grows backward once
+        changes = tempo_days.merge(sorted(days))
+        self._history_start = max(complete_from, API_HISTORY_START)
+        generation = self._snapshot.generation
+        self._publish(tempo_days, self._snapshot.fetched_at, changes)
+        _LOGGER.debug(
+            "Merged %d history days, history complete from %s",
+            len(days),
+            self._history_start,
+        )
+        if self._snapshot.generation != generation:
+            self.data = self._snapshot.generation
+            self.async_update_listeners()
+        self._save_cache()
+
+    def _publish(
+        self,
+        tempo_days: TempoDaysStore,
+        fetched_at: datetime.datetime,
+        changes: TempoDaysDiff | None,
+    ) -> None:
+        """Swap the snapshot read by the entities for a new one (new generation unless changes are known to be empty)."""
+        snapshot = self._snapshot
+        generation = snapshot.generation
+        cycle = snapshot.cycle
+        if changes is None or not changes.empty():
+            generation += 1
+            cycle = None
+        today = tempo_date(self._clock())
+        if cycle is None or not cycle.Start <= today < cycle.End:
+            cycle = tempo_days.cycle_summary(today)
+        self._snapshot = TempoSnapshot(
+            days=tempo_days,
+            generation=generation,
+            fetched_at=fetched_at,
+            cycle=cycle,
+            adjusted_entries=snapshot.adjusted_entries,
+        )
+
+    def _save_cache(self):
+        """Schedule the days cache to be written on the local store."""
+        if self._last_reconciliation is None or self._snapshot.fetched_at is None:
+            return
+        self._store.async_delay_save(self._cache_data, STORE_SAVE_DELAY)
+
+    def _cache_data(self) -> dict[str, Any]:
+        """Serialize the days cache for the local store."""
+        snapshot = self._snapshot
+        return {
+            STORE_KEY_LAST_RECONCILIATION: self._last_reconciliation.isoformat(),
+            STORE_KEY_LAST_FETCH: snapshot.fetched_at.isoformat(),
+            STORE_KEY_DAYS: [
+                {
+                    STORE_KEY_DATE: day.isoformat(),
+                    STORE_KEY_VALUE: value,
+                    STORE_KEY_UPDATED: updated.isoformat(),
+                }
+                for day, value, updated in snapshot.days.days()
+            ],
+            STORE_KEY_TOKEN: self._tokens.as_dict(),
+            STORE_KEY_HISTORY_START: self._history_start.isoformat()
+            if self._history_start
+            else None,
+        }
 
 
+@lru_cache(maxsize=API_PARSE_CACHE_SIZE)
 def parse_rte_api_datetime(date: str) -> datetime.datetime:
-    """RTE API has a date format incompatible with python parsing."""
-    date = (
-        date[:-3] + date[-2:]
-    )  # switch to a python format (remove ':' from rte tzinfo)
-    return datetime.datetime.strptime(date, API_DATE_FORMAT)
+    """RTE API gives ISO 8601 datetimes (memoized as each poll returns mostly the same ones)."""
+    return datetime.datetime.fromisoformat(date)
 
 
+@lru_cache(maxsize=API_PARSE_CACHE_SIZE)
 def parse_rte_api_date(date: str) -> datetime.date:
-    """RTE API has a date format incompatible with python parsing."""
-    day_datetime = parse_rte_api_datetime(date)
-    return datetime.date(
-        year=day_datetime.year, month=day_datetime.month, day=day_datetime.day
-    )
-
+    """RTE API gives days as ISO 8601 datetimes at midnight: only keep the date part."""
+    return datetime.date.fromisoformat(date[:10])
 
-def application_tester(client_id: str, client_secret: str):
-    """Test application credentials against the API."""
-    auth = HTTPBasicAuth(client_id, client_secret)
-    oauth = OAuth2Session(client=BackendApplicationClient(client_id=client_id))
-    oauth.fetch_token(token_url=API_TOKEN_ENDPOINT, auth=auth)
-    response = oauth.get(API_TEMPO_ENDPOINT, timeout=API_REQ_TIMEOUT)
-    handle_api_errors(response)
 
-
-def handle_api_errors(response: requests.Response):
-    """Use to handle all errors described in the API documentation."""
-    if response.status_code == 400:
+def parse_rte_api_days(
+    values: list[dict[str, str]]
+) -> list[tuple[datetime.date, str, datetime.datetime]]:
+    """Parse the days of an API payload as (date, value, updated) with a single parse of each timestamp."""
+    tempo_days: list[tuple[datetime.date, str, datetime.datetime]] = []
+    for tempo_day in values:
         try:
-            payload = response.json()
-            raise BadRequest(
-                response.status_code,
-                f"{payload[API_KEY_ERROR]}: {payload[API_KEY_ERROR_DESC]}",
-            )
-        except requests.JSONDecodeError as exc:
-            raise BadRequest(
-                response.status_code, f"Failed to decode JSON payload: {response.text}"
-            ) from exc
-        except KeyError as exc:
-            raise BadRequest(
-                response.status_code,
-                f"Failed to decode access JSON error payload: {response.text}",
-            ) from exc
-    elif response.status_code == 401:
-        raise BadRequest(response.status_code, "Unauthorized")
-    elif response.status_code == 403:
-        raise BadRequest(response.status_code, "Forbidden")
-    elif response.status_code == 404:
-        raise BadRequest(response.status_code, "Not Found")
-    elif response.status_code == 408:
-        raise BadRequest(response.status_code, "Request Time-out")
-    elif response.status_code == 413:
-        raise BadRequest(response.status_code, "Request Entity Too Large")
-    elif response.status_code == 414:
-        raise BadRequest(response.status_code, "Request-URI Too Long")
-    elif response.status_code == 429:
-        raise BadRequest(response.status_code, "Too Many Requests")
-    elif response.status_code == 500:
+            value = tempo_day[API_KEY_VALUE]
+        except KeyError as key_error:
+            if tempo_day[API_KEY_START] == "2022-12-28T00:00:00+01:00":
+                # RTE has issued a warning concerning this day missing data on their API: its blue
+                value = API_VALUE_BLUE
+            else:
+                _LOGGER.warning(
+                    "Following day failed to be processed with %s, skipping: %s",
+                    repr(key_error),
+                    tempo_day,
+                )
+                continue
         try:
-            payload = response.json()
-            raise ServerError(
-                response.status_code,
-                f"{payload[API_KEY_ERROR]}: {payload[API_KEY_ERROR_DESC]}",
+            tempo_days.append(
+                (
+                    parse_rte_api_date(tempo_day[API_KEY_START]),
+                    value,
+                    parse_rte_api_datetime(tempo_day[API_KEY_UPDATED]),
+                )
             )
-        except requests.JSONDecodeError as exc:
-            raise ServerError(
-                response.status_code, f"Failed to decode JSON payload: {response.text}"
-            ) from exc
-        except KeyError as exc:
-            raise ServerError(
-                response.status_code,
-                f"Failed to decode access JSON error payload: {response.text}",
-            ) from exc
-    elif response.status_code == 503:
-        raise ServerError(response.status_code, "Service Unavailable")
-    elif response.status_code == 509:
-        raise ServerError(response.status_code, "Bandwidth Limit Exceeded")
-    elif response.status_code != 200:
-        raise UnexpectedError(
-            response.status_code, f"Unexpected HTTP code: {response.text}"
-        )
-
-
-class BadRequest(Exception):
-    """Represents a API HTTP 4xx error."""
-
-    def __init__(self, code: int, message: str) -> None:
-        """Initialize the BadRequest exception."""
-        self.code = code
-        super().__init__(f"HTTP code {code}: {message}")
-
-
-class ServerError(Exception):
-    """Represents a API HTTP 5xx error."""
-
-    def __init__(self, code: int, message: str) -> None:
-        """Initialize the ServerError exception."""
-        self.code = code
-        super().__init__(f"HTTP code {code}: {message}")
-
-
-class UnexpectedError(Exception):
-    """Represents any HTTP error not described by the API documentation."""
-
-    def __init__(self, code: int, message: str) -> None:
-        """Initialize the UnexpectedError exception."""
-        self.code = code
-        super().__init__(f"HTTP code {code}: {message}")
+        except (KeyError, ValueError) as exc:
+            _LOGGER.warning(
+                "Following day failed to be processed with %s, skipping: %s",
+                repr(exc),
+                tempo_day,
+            )
+    return tempo_days
@@ -1,7 +1,7 @@
 """Binary sensors for linkytic integration."""
 from __future__ import annotations
 
-import datetime
+import logging
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -15,10 +15,10 @@ from .const import (
     DEVICE_MODEL,
     DEVICE_NAME,
     DOMAIN,
-    FRANCE_TZ,
-    HOUR_OF_CHANGE,
-    OFF_PEAK_START,
 )
+from .entry_updater import EntryUpdater, TickContext
+
+_LOGGER = logging.getLogger(__name__)
 
 
 # config flow setup
@@ -28,12 +28,21 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Modern (thru config entry) sensors setup."""
-    # Init sensors
+    # Retrieve the entry update pipeline
+    try:
+        updater = hass.data[DOMAIN][config_entry.entry_id].updater
+    except KeyError:
+        _LOGGER.error(
+            "%s: can not init binary sensors: failed to get the entry update pipeline",
+            config_entry.title,
+        )
+        return
+    # Init sensors (their states are computed by the entry update pipeline when added)
     sensors = [
-        OffPeakHours(config_entry.entry_id),
+        OffPeakHours(config_entry.entry_id, updater),
     ]
     # Add the entities to HA
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
 
 
 class OffPeakHours(BinarySensorEntity):
@@ -43,21 +52,22 @@ class OffPeakHours(BinarySensorEntity):
     #   https://developers.home-assistant.io/docs/core/entity#generic-properties
     _attr_has_entity_name = True
     _attr_name = "Heures Creuses"
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_icon = "mdi:cash-clock"
 
     # Binary sensor properties
     #   https://developers.home-assistant.io/docs/core/entity/binary-sensor/#properties
     # _attr_device_class = BinarySensorDeviceClass.RUNNING
 
-    def __init__(self, config_id: str) -> None:
+    def __init__(self, config_id: str, updater: EntryUpdater) -> None:
         """Initialize the OffPeakHours binary sensor."""
         # Generic entity properties
         self._attr_unique_id = f"{DOMAIN}_{config_id}_off_peak"
-        # Sensor entity properties
-        self._attr_native_value: datetime.datetime | None = None
+        # Binary sensor entity properties
+        self._attr_is_on: bool | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
+        self._updater = updater
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -70,11 +80,13 @@ class OffPeakHours(BinarySensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update/Recompute the value of the sensor."""
-        localized_now = datetime.datetime.now(tz=FRANCE_TZ)
-        if localized_now.hour >= OFF_PEAK_START or localized_now.hour < HOUR_OF_CHANGE:
-            self._attr_is_on = True
-        else:
-            self._attr_is_on = False
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = self._attr_is_on
+        self._attr_is_on = tick.off_peak
+        return self._attr_is_on != previous
@@ -1,21 +1,20 @@
 """RTE Tempo Calendar."""
 from __future__ import annotations
 
-import asyncio
 import datetime
 import logging
+from typing import TYPE_CHECKING
 
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .api_worker import APIWorker, TempoDay
 from .const import (
     API_ATTRIBUTION,
-    API_REQ_TIMEOUT,
+    API_FIRST_DATA_TIMEOUT,
     API_VALUE_BLUE,
     API_VALUE_RED,
     API_VALUE_WHITE,
@@ -24,6 +23,7 @@ from .const import (
     DEVICE_NAME,
     DOMAIN,
     FRANCE_TZ,
+    HOUR_OF_CHANGE,
     SENSOR_COLOR_BLUE_EMOJI,
     SENSOR_COLOR_BLUE_NAME,
     SENSOR_COLOR_RED_EMOJI,
@@ -32,6 +32,11 @@ from .const import (
     SENSOR_COLOR_WHITE_EMOJI,
     SENSOR_COLOR_WHITE_NAME,
 )
+from .entry_updater import EntryUpdater, TickContext
+from .tempo_days import TempoDay, forge_tempo_days, tempo_date
+
+if TYPE_CHECKING:
+    from .api_worker import APIWorker
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,19 +51,21 @@ async def async_setup_entry(
     _LOGGER.debug("%s: setting up calendar plateform", config_entry.title)
     # Retrieve the API Worker object
     try:
-        api_worker = hass.data[DOMAIN][config_entry.entry_id]
+        entry_data = hass.data[DOMAIN][config_entry.entry_id]
     except KeyError:
         _LOGGER.error(
             "%s: can not calendar: failed to get the API worker object",
             config_entry.title,
         )
         return
-    # Wait request timeout to let API worker get first batch of data before initializing calendar
-    await asyncio.sleep(API_REQ_TIMEOUT)
+    # Wait for the API worker first batch of data before initializing calendar
+    # (the calendar is filled in later by the API worker updates if it takes too long)
+    api_worker = entry_data.api_worker
+    if not await api_worker.async_wait_first_data(API_FIRST_DATA_TIMEOUT):
+        _LOGGER.debug("%s: no data yet, adding calendar anyway", config_entry.title)
     # Init sensors
     async_add_entities(
-        [TempoCalendar(api_worker, config_entry.entry_id)],
-        True,
+        [TempoCalendar(api_worker, entry_data.updater, config_entry)],
     )
 
 
@@ -68,17 +75,53 @@ class TempoCalendar(CalendarEntity):
     # Generic entity properties
     _attr_has_entity_name = True
     _attr_attribution = API_ATTRIBUTION
+    _attr_should_poll = False
 
-    def __init__(self, api_worker: APIWorker, config_id) -> None:
+    def __init__(
+        self,
+        api_worker: APIWorker,
+        updater: EntryUpdater,
+        config_entry: ConfigEntry,
+    ) -> None:
         """Initialize the calendar."""
         # Generic entity properties
         self._attr_name = "Calendrier"
-        self._attr_unique_id = f"{DOMAIN}_{config_id}_calendar"
+        self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_calendar"
         # TempoCalendar properties
         self._api_worker = api_worker
-        self._config_id = config_id
+        self._updater = updater
+        self._config_id = config_entry.entry_id
+        self._generation = api_worker.generation
+        # day, option value and color of the current event last written
+        self._current: tuple[datetime.date, bool, str | None] | None = None
+        self._events: dict[
+            tuple[datetime.date, bool], tuple[str, float, CalendarEvent]
+        ] = {}
         super().__init__()
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline (data, transitions and options updates)."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
+    @callback
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Forget the events of the evicted days on new data, return True if the current event changed."""
+        snapshot = tick.snapshot
+        if self._generation != snapshot.generation:
+            self._generation = snapshot.generation
+            oldest_day = snapshot.days.oldest_day()
+            for key in [
+                key for key in self._events if not oldest_day or key[0] < oldest_day
+            ]:
+                del self._events[key]
+        # adjusted days run from 6h to 6h, regular ones are all day events
+        today = tick.today if tick.adjusted else tick.now.date()
+        current = (today, tick.adjusted, snapshot.days.color_for_date(today))
+        if current == self._current:
+            return False
+        self._current = current
+        return True
+
     async def async_get_events(
         self,
         hass: HomeAssistant,
@@ -86,39 +129,34 @@ class TempoCalendar(CalendarEntity):
         end_date: datetime.datetime,
     ) -> list[CalendarEvent]:
         """Return calendar events within a datetime range."""
-        tempo_days = self._api_worker.get_calendar_days()
-        events: list[CalendarEvent] = []
-        if self._api_worker.adjusted_days:
-            # we are dealing with datetimes
-            for tempo_day in tempo_days:
-                if tempo_day.Start >= start_date and tempo_day.End <= end_date:
-                    events.append(forge_calendar_event(tempo_day))
-                elif tempo_day.Start < start_date < tempo_day.End < end_date:
-                    events.append(forge_calendar_event(tempo_day))
-                elif start_date < tempo_day.Start < end_date < tempo_day.End:
-                    events.append(forge_calendar_event(tempo_day))
+        # a single snapshot read: the days and the option value are consistent
+        snapshot = self._api_worker.snapshot
+        tempo_days = snapshot.days
+        adjusted = snapshot.adjusted(self._config_id)
+        if adjusted:
+            # we are dealing with datetimes: days running from 6h to 6h
+            first_day = tempo_date(start_date)
+            last_day = tempo_date(end_date)
+            if (
+                datetime.datetime.combine(
+                    last_day, datetime.time(hour=HOUR_OF_CHANGE, tzinfo=FRANCE_TZ)
+                )
+                >= end_date
+            ):
+                last_day -= datetime.timedelta(days=1)
         else:
             # we are dealing with dates (all day events)
-            for tempo_day in tempo_days:
-                if (
-                    tempo_day.Start >= start_date.date()
-                    and tempo_day.End <= end_date.date()
-                ):
-                    events.append(forge_calendar_event(tempo_day))
-                elif (
-                    tempo_day.Start
-                    <= start_date.date()
-                    <= tempo_day.End
-                    <= end_date.date()
-                ):
-                    events.append(forge_calendar_event(tempo_day))
-                elif (
-                    start_date.date()
-                    <= tempo_day.Start
-                    <= end_date.date()
-                    <= tempo_day.End
-                ):
-                    events.append(forge_calendar_event(tempo_day))
+            first_day = start_date.date()
+            last_day = end_date.date()
+            if end_date == datetime.datetime.combine(
+                last_day, datetime.time(), tzinfo=end_date.tzinfo
+            ):
+                last_day -= datetime.timedelta(days=1)
+        # days are indexed by their ordinal: directly extract the range
+        events = [
+            self._get_event(day, value, updated, adjusted)
+            for day, value, updated in tempo_days.iter_range(first_day, last_day)
+        ]
         _LOGGER.debug(
             "Returning %d events (on %d available) for range %s <> %s",
             len(events),
@@ -143,18 +181,33 @@ class TempoCalendar(CalendarEntity):
     def event(self) -> CalendarEvent | None:
         """Return the current active event if any."""
         localized_now = datetime.datetime.now(FRANCE_TZ)
-        if self._api_worker.adjusted_days:
+        snapshot = self._api_worker.snapshot
+        adjusted = snapshot.adjusted(self._config_id)
+        if adjusted:
             # we are dealing with datetimes
-            for tempo_day in self._api_worker.get_calendar_days():
-                if tempo_day.Start <= localized_now < tempo_day.End:
-                    return forge_calendar_event(tempo_day)
+            today = tempo_date(localized_now)
         else:
             # we are dealing with dates (all day events)
-            for tempo_day in self._api_worker.get_calendar_days():
-                if tempo_day.Start <= localized_now.date() < tempo_day.End:
-                    return forge_calendar_event(tempo_day)
+            today = localized_now.date()
+        for day, value, updated in snapshot.days.iter_range(today, today):
+            return self._get_event(day, value, updated, adjusted)
         return None
 
+    def _get_event(
+        self, day: datetime.date, value: str, updated: float, adjusted: bool
+    ) -> CalendarEvent:
+        """Return the calendar event of a day, only forged again if the day has changed."""
+        key = (day, adjusted)
+        cached = self._events.get(key)
+        if cached and cached[0] == value and cached[1] == updated:
+            return cached[2]
+        tempo_day_time, tempo_day_date = forge_tempo_days(
+            day, value, datetime.datetime.fromtimestamp(updated, FRANCE_TZ)
+        )
+        event = forge_calendar_event(tempo_day_time if adjusted else tempo_day_date)
+        self._events[key] = (value, updated, event)
+        return event
+
 
 def forge_calendar_event(tempo_day: TempoDay):
     """Forge a Home Assistant Calendar Event from a Tempo day."""
@@ -1,19 +1,32 @@
 """Config flow for RTE Tempo Calendar."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
-from oauthlib.oauth2.rfc6749.errors import OAuth2Error
-from requests.exceptions import RequestException
+import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .api_worker import BadRequest, ServerError, UnexpectedError, application_tester
-from .const import CONFIG_CLIEND_SECRET, CONFIG_CLIENT_ID, DOMAIN, OPTION_ADJUSTED_DAYS
+from .api_client import (
+    BadRequest,
+    ServerError,
+    UnexpectedError,
+    async_application_tester,
+    store_probe,
+)
+from .const import (
+    CONFIG_CLIEND_SECRET,
+    CONFIG_CLIENT_ID,
+    DOMAIN,
+    OPTION_ADJUSTED_DAYS,
+    OPTION_HISTORY_BACKFILL,
+)
+from .token_manager import OAuthError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,15 +60,15 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         try:
             client_id = user_input[CONFIG_CLIENT_ID]
             client_secret = user_input[CONFIG_CLIEND_SECRET]
-            await self.hass.async_add_executor_job(
-                lambda: application_tester(str(client_id), str(client_secret))
+            probe = await async_application_tester(
+                self.hass, str(client_id), str(client_secret)
             )
-        except RequestException as request_exception:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as request_exception:
             _LOGGER.error(
                 "Application validation failed: network error: %s", request_exception
             )
             errors["base"] = "network_error"
-        except OAuth2Error as oauth_error:
+        except OAuthError as oauth_error:
             _LOGGER.error("Application validation failed: oauth error: %s", oauth_error)
             errors["base"] = "oauth_error"
         except BadRequest as http_error:
@@ -72,6 +85,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
             errors["base"] = "http_unexpected_error"
         else:
+            # hand the token and the days fetched over to the new config entry
+            store_probe(self.hass, str(client_id), probe)
             return self.async_create_entry(
                 title=user_input[CONFIG_CLIENT_ID], data=user_input
             )
@@ -106,7 +121,13 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Required(
                         OPTION_ADJUSTED_DAYS,
                         default=self.config_entry.options.get(OPTION_ADJUSTED_DAYS),
-                    ): bool
+                    ): bool,
+                    vol.Required(
+                        OPTION_HISTORY_BACKFILL,
+                        default=self.config_entry.options.get(
+                            OPTION_HISTORY_BACKFILL, False
+                        ),
+                    ): bool,
                 }
             ),
         )
@@ -1,7 +1,29 @@
 """Constants for the RTE Tempo Calendar integration."""
+import datetime
 from zoneinfo import ZoneInfo
 
 DOMAIN = "rtetempo"
+# hass.data[DOMAIN] key of the API worker shared by all the config entries
+DATA_API_WORKER = "api_worker"
+# hass.data[DOMAIN] key of the Home Assistant stop listener of the API worker
+DATA_STOP_LISTENER = "stop_listener"
+# hass.data[DOMAIN] key of the config flow probes waiting for their config entry
+DATA_PROBES = "probes"
+
+
+# Storage
+
+STORE_VERSION = 1
+STORE_SAVE_DELAY = 10
+STORE_KEY_LAST_RECONCILIATION = "last_reconciliation"
+STORE_KEY_LAST_FETCH = "last_fetch"
+STORE_KEY_DAYS = "days"
+STORE_KEY_DATE = "date"
+STORE_KEY_VALUE = "value"
+STORE_KEY_UPDATED = "updated"
+STORE_KEY_TOKEN = "token"
+STORE_KEY_TOKEN_ENTRY = "entry_id"
+STORE_KEY_HISTORY_START = "history_start"
 
 
 # Config Flow
@@ -9,6 +31,7 @@ DOMAIN = "rtetempo"
 CONFIG_CLIENT_ID = "client_id"
 CONFIG_CLIEND_SECRET = "client_secret"
 OPTION_ADJUSTED_DAYS = "adjusted_days"
+OPTION_HISTORY_BACKFILL = "history_backfill"
 
 
 # Service Device
@@ -39,6 +62,33 @@ API_TEMPO_ENDPOINT = (
     f"https://{API_DOMAIN}/open_api/tempo_like_supply_contract/v1/tempo_like_calendars"
 )
 API_REQ_TIMEOUT = 3
+API_FIRST_DATA_TIMEOUT = 2 * API_REQ_TIMEOUT  # token and data requests of the first fetch
+API_PROBE_MAX_AGE = 10  # minutes, config flow probe adopted by the new config entry
+API_PARSE_CACHE_SIZE = 1024
+API_TOKEN_KEY_ACCESS = "access_token"
+API_TOKEN_KEY_EXPIRES_IN = "expires_in"
+API_TOKEN_EXPIRES_AT = "expires_at"
+API_TOKEN_OBTAINED_AT = "obtained_at"
+API_TOKEN_EXPIRY_MARGIN = 60  # seconds, a token this close to its expiration is renewed
+API_TOKEN_RENEWAL_LEAD = 120  # seconds, background renewal ahead of the next fetch
+API_TOKEN_RENEWAL_JITTER = 60  # seconds
+API_HISTORY_DAYS = 364
+API_HOT_WINDOW_DAYS = 1
+API_ANNOUNCEMENT_WINDOW_DAYS = 0  # announcement polls: today to J+2
+API_CONFIRMATION_WINDOW_DAYS = -1  # confirmation: J+1 only
+API_FUTURE_DAYS = 2
+API_RECONCILIATION_HOURS = 24
+API_HISTORY_START = datetime.date(2014, 9, 1)  # oldest Tempo day served by the API
+API_MAX_WINDOW_DAYS = 366  # longest range of a single request
+API_BACKFILL_CONCURRENCY = 2  # history requests in flight at most
+API_BACKFILL_INTERVAL = 5  # seconds, between the starts of two history requests
+API_BACKFILL_LIVE_GUARD = 60  # seconds, no history request this close to a planned fetch
+API_BACKFILL_RETRY_DELAY = 3600  # seconds, before resuming a failed history backfill
+API_RETRY_FIRST_DELAY = 10  # seconds, upper bound of the first retry after a transient error
+API_RETRY_MAX_DELAY = 600  # seconds, longest wait between two retries of a transient error
+API_RETRY_AFTER_MAX = 6 * 3600  # seconds, longest Retry-After honoured
+API_CIRCUIT_OPEN_DELAY = 3600  # seconds, pause after the credentials have been rejected
+API_CIRCUIT_MAX_DELAY = 24 * 3600  # seconds, longest pause while they keep being rejected
 API_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
 API_KEY_ERROR = "error"
 API_KEY_ERROR_DESC = "error_description"
@@ -0,0 +1,48 @@
+"""Diagnostics support for RTE Tempo Calendar."""
+from __future__ import annotations
+
+import datetime
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, FRANCE_TZ
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the state of the shared API worker (access token, retries, next fetch) without the credentials."""
+    api_worker = hass.data[DOMAIN][config_entry.entry_id].api_worker
+    tokens = api_worker.tokens
+    retry = api_worker.retry
+    plan = api_worker.scheduler.next_fetch
+    snapshot = api_worker.snapshot
+    return {
+        "token": {
+            "age": tokens.token_age,
+            "expires_at": datetime.datetime.fromtimestamp(
+                tokens.expires_at, FRANCE_TZ
+            )
+            if tokens.expires_at
+            else None,
+            "refresh_count": tokens.refresh_count,
+            "credentials": tokens.nb_credentials,
+        },
+        "retry": {
+            "failures": retry.failures,
+            "circuit_open": retry.circuit_open,
+        },
+        "next_fetch": {
+            "at": plan.at if plan else None,
+            "reason": plan.reason if plan else None,
+        },
+        "days": {
+            "count": len(snapshot.days),
+            "oldest": snapshot.days.oldest_day(),
+            "newest": snapshot.days.newest_day(),
+            "generation": snapshot.generation,
+            "fetched_at": snapshot.fetched_at,
+        },
+    }
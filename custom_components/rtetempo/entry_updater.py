@@ -0,0 +1,179 @@
+"""Batch update pipeline of the RTE Tempo Calendar entities of a config entry."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import datetime
+from functools import partial
+import logging
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import FRANCE_TZ, HOUR_OF_CHANGE, OFF_PEAK_START
+from .tempo_days import CycleSummary, TempoSnapshot, tempo_date
+from .transitions import (
+    TRANSITION_CYCLE_START,
+    TRANSITION_DAY_CHANGE,
+    TRANSITION_OFF_PEAK_START,
+    TransitionScheduler,
+    next_cycle_start,
+    next_wall_clock,
+)
+
+if TYPE_CHECKING:
+    from .api_worker import APIWorker
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TickContext(NamedTuple):
+    """Represents everything the entities of a config entry derive their state from, computed once per update."""
+
+    now: datetime.datetime  # France time
+    snapshot: TempoSnapshot
+    adjusted: bool  # adjusted days option of the config entry
+    today: datetime.date  # tempo day running
+    current_color: str | None
+    next_day: datetime.date | None  # first day with data after the running one
+    next_color: str | None
+    cycle: CycleSummary  # bounds and counters of the current cycle
+    off_peak: bool
+    next_day_change: datetime.datetime
+    next_off_peak_start: datetime.datetime
+    next_cycle_start: datetime.datetime
+    valid_until: datetime.datetime  # next transition or midnight
+
+
+class TickEntity(Protocol):
+    """Entity updated by the batch update pipeline."""
+
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context and return True if it changed."""
+
+    def async_write_ha_state(self) -> None:
+        """Write the state to the state machine."""
+
+
+def forge_tick(
+    localized_now: datetime.datetime, snapshot: TempoSnapshot, entry_id: str
+) -> TickContext:
+    """Compute the tick context of a config entry from the current snapshot of the data."""
+    localized_now = localized_now.astimezone(FRANCE_TZ)
+    tempo_days = snapshot.days
+    today = tempo_date(localized_now)
+    next_day = tempo_days.next_known_day(today)
+    next_day_change = next_wall_clock(localized_now, HOUR_OF_CHANGE)
+    next_off_peak_start = next_wall_clock(localized_now, OFF_PEAK_START)
+    cycle_start = next_cycle_start(localized_now)
+    midnight = datetime.datetime.combine(
+        localized_now.date() + datetime.timedelta(days=1),
+        datetime.time(tzinfo=FRANCE_TZ),
+    )
+    return TickContext(
+        now=localized_now,
+        snapshot=snapshot,
+        adjusted=snapshot.adjusted(entry_id),
+        today=today,
+        current_color=tempo_days.color_for_date(today),
+        next_day=next_day,
+        next_color=None if next_day is None else tempo_days.color_for_date(next_day),
+        cycle=snapshot.cycle_summary(localized_now),
+        off_peak=localized_now.hour >= OFF_PEAK_START
+        or localized_now.hour < HOUR_OF_CHANGE,
+        next_day_change=next_day_change,
+        next_off_peak_start=next_off_peak_start,
+        next_cycle_start=cycle_start,
+        valid_until=min(next_day_change, next_off_peak_start, cycle_start, midnight),
+    )
+
+
+class EntryUpdater:
+    """Compute the tick context of a config entry once and apply it to all its entities in a single callback.
+
+    The entities are updated on each new data generation of the API worker,
+    on each Tempo transition and on options updates. Only the entities whose
+    state actually changed are written to the state machine.
+    """
+
+    def __init__(
+        self,
+        api_worker: APIWorker,
+        transitions: TransitionScheduler,
+        entry_id: str,
+        clock: Callable[[], datetime.datetime] = partial(
+            datetime.datetime.now, FRANCE_TZ
+        ),
+    ) -> None:
+        """Initialize the update pipeline of a config entry."""
+        self._api_worker = api_worker
+        self._transitions = transitions
+        self._entry_id = entry_id
+        self._clock = clock
+        self._entities: list[TickEntity] = []
+        self._tick: TickContext | None = None
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_add_entity(self, entity: TickEntity) -> CALLBACK_TYPE:
+        """Register an entity and give it its initial state (before its first write)."""
+        self._entities.append(entity)
+        if not self._unsubs:
+            self._unsubs = [
+                self._api_worker.async_add_listener(self.async_update),
+                self._transitions.async_add_listener(
+                    self.async_update,
+                    [
+                        TRANSITION_DAY_CHANGE,
+                        TRANSITION_OFF_PEAK_START,
+                        TRANSITION_CYCLE_START,
+                    ],
+                ),
+            ]
+        entity.apply_tick(self.current_tick())
+
+        @callback
+        def remove_entity() -> None:
+            """Unregister the entity."""
+            self._entities.remove(entity)
+            if not self._entities:
+                self.async_shutdown()
+
+        return remove_entity
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening for updates."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @callback
+    def current_tick(self) -> TickContext:
+        """Return the tick context, only computed again if the data or the time boundaries have changed since."""
+        localized_now = self._clock()
+        tick = self._tick
+        if (
+            tick is None
+            or tick.snapshot is not self._api_worker.snapshot
+            or localized_now >= tick.valid_until
+        ):
+            tick = self._tick = forge_tick(
+                localized_now, self._api_worker.snapshot, self._entry_id
+            )
+        return tick
+
+    @callback
+    def async_update(self) -> None:
+        """Apply a new tick context to all the entities and write the states that changed."""
+        self._tick = None
+        tick = self.current_tick()
+        written = 0
+        for entity in list(self._entities):
+            if entity.apply_tick(tick):
+                entity.async_write_ha_state()
+                written += 1
+        _LOGGER.debug(
+            "Tick applied to %d entities, %d state(s) written",
+            len(self._entities),
+            written,
+        )
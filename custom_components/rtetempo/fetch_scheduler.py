@@ -0,0 +1,231 @@
+"""Fetch scheduler for the RTE Tempo API worker: absolute deadlines on the France wall clock."""
+from __future__ import annotations
+
+import datetime
+import logging
+import random
+from typing import NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import (
+    CONFIRM_CHECK,
+    CONFIRM_HOUR,
+    CONFIRM_MIN,
+    FRANCE_TZ,
+    HOUR_OF_CHANGE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# reasons of a planned fetch
+FETCH_REASON_NEXT_DAY = "next_day"  # next day color known, wait for the day change
+FETCH_REASON_CONFIRMATION = "confirmation"  # next day color published early, confirm it
+FETCH_REASON_DAY_CHANGE = "day_change"  # next day color unknown before the day change
+FETCH_REASON_ANNOUNCEMENT = "announcement"  # next day color not announced yet
+FETCH_REASON_ANNOUNCEMENT_WINDOW = "announcement_window"  # not announced yet within the usual announcement time
+FETCH_REASON_UNEXPECTED = "unexpected"  # data neither up to today nor tomorrow
+FETCH_REASON_RETRY = "retry"  # last fetch failed
+FETCH_REASON_CIRCUIT_OPEN = "circuit_open"  # credentials rejected
+
+# fetch periods of the reasons without a wall clock deadline
+ANNOUNCEMENT_EARLY_PERIOD = datetime.timedelta(hours=2)  # before the announcement window
+ANNOUNCEMENT_PERIOD = datetime.timedelta(minutes=30)  # past the announcement window
+ANNOUNCEMENT_WINDOW_PERIOD = datetime.timedelta(minutes=10)
+# announcement window: from a bit before the publication time (CONFIRM_HOUR:CONFIRM_MIN)
+# to two hours past the confirmation check
+ANNOUNCEMENT_WINDOW_LEAD = datetime.timedelta(minutes=10)
+ANNOUNCEMENT_WINDOW_TAIL = datetime.timedelta(hours=2)
+UNEXPECTED_PERIOD = datetime.timedelta(hours=1)
+
+
+class JitterWindow(NamedTuple):
+    """Represents the random shift of a deadline: up to before seconds earlier and after seconds later."""
+
+    before: float
+    after: float
+
+
+# spread the fetches of all the instances: never earlier than a day change, +-1/6 of the periods
+DEFAULT_JITTER: dict[str, JitterWindow] = {
+    FETCH_REASON_NEXT_DAY: JitterWindow(0, 900),
+    FETCH_REASON_CONFIRMATION: JitterWindow(900, 900),
+    FETCH_REASON_DAY_CHANGE: JitterWindow(0, 900),
+    FETCH_REASON_ANNOUNCEMENT: JitterWindow(300, 300),
+    FETCH_REASON_ANNOUNCEMENT_WINDOW: JitterWindow(100, 100),
+    FETCH_REASON_UNEXPECTED: JitterWindow(600, 600),
+}
+
+
+class FetchPlan(NamedTuple):
+    """Represents the next planned fetch."""
+
+    at: datetime.datetime
+    reason: str
+
+
+class FetchScheduler:
+    """Plan the next fetch as an absolute France wall clock deadline and expose it.
+
+    Wall clock deadlines (day change, confirmation) are built on their local
+    date so they stay right across DST changes, and every delay is computed on
+    UTC instants.
+    """
+
+    def __init__(
+        self,
+        jitter: dict[str, JitterWindow] | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize the fetch scheduler (a custom jitter policy and random generator can be given)."""
+        self._jitter = DEFAULT_JITTER if jitter is None else jitter
+        self._rng = rng or random.Random()
+        self._next_fetch: FetchPlan | None = None
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @property
+    def next_fetch(self) -> FetchPlan | None:
+        """Return the next planned fetch, if any."""
+        return self._next_fetch
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for new plans."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def plan(
+        self,
+        localized_now: datetime.datetime,
+        data_end: datetime.datetime,
+        last_day_updated: datetime.datetime | None = None,
+    ) -> FetchPlan:
+        """Plan the next fetch depending on the end of the data fetched and the publication time of its last day."""
+        today = localized_now.astimezone(FRANCE_TZ).date()
+        days_ahead = (data_end.astimezone(FRANCE_TZ).date() - today).days
+        if days_ahead == 2:
+            # we have next day color, check if we need to confirm or wait until tomorrow
+            if localized_now.astimezone(FRANCE_TZ).time() > datetime.time(
+                hour=CONFIRM_HOUR, minute=CONFIRM_MIN
+            ) or announcement_confirmed(localized_now, last_day_updated):
+                deadline = wall_clock(
+                    today + datetime.timedelta(days=1), HOUR_OF_CHANGE
+                )
+                reason = FETCH_REASON_NEXT_DAY
+            else:
+                deadline = wall_clock(today, CONFIRM_CHECK)
+                reason = FETCH_REASON_CONFIRMATION
+        elif days_ahead == 1:
+            # we do not have next day color yet
+            if localized_now.astimezone(FRANCE_TZ).hour < HOUR_OF_CHANGE:
+                # one second after: never hit the API at 5:59:59
+                deadline = wall_clock(today, HOUR_OF_CHANGE) + datetime.timedelta(
+                    seconds=1
+                )
+                reason = FETCH_REASON_DAY_CHANGE
+            else:
+                window_start = (
+                    datetime.datetime.combine(
+                        today,
+                        datetime.time(
+                            hour=CONFIRM_HOUR, minute=CONFIRM_MIN, tzinfo=FRANCE_TZ
+                        ),
+                    )
+                    - ANNOUNCEMENT_WINDOW_LEAD
+                )
+                window_end = after(
+                    wall_clock(today, CONFIRM_CHECK), ANNOUNCEMENT_WINDOW_TAIL
+                )
+                if localized_now < window_start:
+                    # hardly ever announced this early: a few polls until the window opens
+                    deadline = min(
+                        after(localized_now, ANNOUNCEMENT_EARLY_PERIOD), window_start
+                    )
+                    reason = FETCH_REASON_ANNOUNCEMENT
+                elif localized_now < window_end:
+                    # usual announcement time: poll closer (announcement polls are narrow)
+                    deadline = after(localized_now, ANNOUNCEMENT_WINDOW_PERIOD)
+                    reason = FETCH_REASON_ANNOUNCEMENT_WINDOW
+                else:
+                    deadline = after(localized_now, ANNOUNCEMENT_PERIOD)
+                    reason = FETCH_REASON_ANNOUNCEMENT
+        else:
+            # weird, should not happen
+            _LOGGER.warning(
+                "Unexpected delta encountered between today and last result (%d days)",
+                days_ahead,
+            )
+            deadline = after(localized_now, UNEXPECTED_PERIOD)
+            reason = FETCH_REASON_UNEXPECTED
+        return self._publish(localized_now, self._shift(deadline, reason), reason)
+
+    def plan_in(
+        self, localized_now: datetime.datetime, delay: datetime.timedelta, reason: str
+    ) -> FetchPlan:
+        """Plan the next fetch after a delay already jittered (retries)."""
+        return self._publish(localized_now, after(localized_now, delay), reason)
+
+    def _shift(self, deadline: datetime.datetime, reason: str) -> datetime.datetime:
+        window = self._jitter.get(reason)
+        if window is None:
+            return deadline
+        return after(
+            deadline,
+            datetime.timedelta(seconds=self._rng.uniform(-window.before, window.after)),
+        )
+
+    def _publish(
+        self, localized_now: datetime.datetime, deadline: datetime.datetime, reason: str
+    ) -> FetchPlan:
+        # a jittered deadline can not be in the past
+        if delay_until(localized_now, deadline) < datetime.timedelta(seconds=1):
+            deadline = after(localized_now, datetime.timedelta(seconds=1))
+        self._next_fetch = FetchPlan(deadline, reason)
+        _LOGGER.info(
+            "Next fetch planned at %s (%s, in %s)",
+            deadline,
+            reason,
+            delay_until(localized_now, deadline),
+        )
+        for update_callback in list(self._listeners):
+            update_callback()
+        return self._next_fetch
+
+
+def announcement_confirmed(
+    localized_now: datetime.datetime, updated: datetime.datetime | None
+) -> bool:
+    """Check if the next day color has been published for good: on a previous day or after the confirmation time."""
+    if updated is None:
+        return False
+    updated = updated.astimezone(FRANCE_TZ)
+    return updated.date() < localized_now.astimezone(
+        FRANCE_TZ
+    ).date() or updated.time() >= datetime.time(hour=CONFIRM_HOUR, minute=CONFIRM_MIN)
+
+
+def wall_clock(day: datetime.date, hour: int) -> datetime.datetime:
+    """Return a France wall clock hour of a day."""
+    return datetime.datetime.combine(day, datetime.time(hour=hour, tzinfo=FRANCE_TZ))
+
+
+def after(instant: datetime.datetime, delay: datetime.timedelta) -> datetime.datetime:
+    """Return the instant an elapsed delay after another (not a wall clock shift across DST changes)."""
+    return (instant.astimezone(datetime.timezone.utc) + delay).astimezone(FRANCE_TZ)
+
+
+def delay_until(
+    localized_now: datetime.datetime, deadline: datetime.datetime
+) -> datetime.timedelta:
+    """Return the elapsed time between now and a deadline (never negative)."""
+    return max(
+        deadline.astimezone(datetime.timezone.utc)
+        - localized_now.astimezone(datetime.timezone.utc),
+        datetime.timedelta(0),
+    )
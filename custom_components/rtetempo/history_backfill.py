@@ -0,0 +1,209 @@
+"""History backfill of the RTE Tempo API worker: the seasons older than the retention window."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import datetime
+import logging
+from typing import TYPE_CHECKING, NamedTuple
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api_client import BadRequest, ServerError, UnexpectedError
+from .const import (
+    API_BACKFILL_CONCURRENCY,
+    API_BACKFILL_INTERVAL,
+    API_BACKFILL_LIVE_GUARD,
+    API_BACKFILL_RETRY_DELAY,
+    API_HISTORY_START,
+    API_MAX_WINDOW_DAYS,
+    DOMAIN,
+)
+from .fetch_scheduler import delay_until
+from .retry_policy import ErrorKind, classify_error
+from .tempo_days import cycle_bounds
+from .token_manager import OAuthError
+
+if TYPE_CHECKING:
+    from .api_worker import APIWorker
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BackfillWindow(NamedTuple):
+    """Represents the days of a history request (end excluded)."""
+
+    start: datetime.date
+    end: datetime.date
+
+
+def backfill_windows(
+    end: datetime.date, history_start: datetime.date = API_HISTORY_START
+) -> list[BackfillWindow]:
+    """Split the history between its start and a day (excluded) into windows, newest first.
+
+    Windows follow the Tempo cycles (one season per request), each one within
+    the maximum range of the API.
+    """
+    windows: list[BackfillWindow] = []
+    while end > history_start:
+        start = max(
+            cycle_bounds(end - datetime.timedelta(days=1))[0],
+            end - datetime.timedelta(days=API_MAX_WINDOW_DAYS),
+            history_start,
+        )
+        windows.append(BackfillWindow(start, end))
+        end = start
+    return windows
+
+
+class HistoryBackfill:
+    """Fetch the Tempo history older than the retention window without delaying the live fetches.
+
+    The windows are fetched with a bounded concurrency and a minimal interval
+    between two requests, none of them close to a planned live fetch. They are
+    merged newest first and in order: the day from which the history is
+    complete only moves backward and is saved along the days cache, so a
+    restart resumes from it. A failed backfill is resumed after a delay by the
+    next successful live fetch.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        worker: APIWorker,
+        clock: Callable[[], datetime.datetime],
+        concurrency: int = API_BACKFILL_CONCURRENCY,
+        interval: float = API_BACKFILL_INTERVAL,
+    ) -> None:
+        """Initialize the history backfill of an API worker."""
+        self._hass = hass
+        self._worker = worker
+        self._clock = clock
+        self._concurrency = concurrency
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self._next_request = 0.0  # event loop time
+        self._resume_at: datetime.datetime | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start the backfill of the missing history, unless running or waiting after a failure."""
+        if self._task is not None:
+            return
+        if self._resume_at is not None and self._clock() < self._resume_at:
+            return
+        if not backfill_windows(self._worker.history_boundary()):
+            return
+        self._resume_at = None
+        self._task = self._hass.async_create_background_task(
+            self._async_run(), f"{DOMAIN}_history_backfill"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the backfill in progress."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_run(self) -> None:
+        windows = backfill_windows(self._worker.history_boundary())
+        _LOGGER.info(
+            "Backfilling the Tempo history from %s to %s (%d requests)",
+            windows[-1].start,
+            windows[0].end,
+            len(windows),
+        )
+        semaphore = asyncio.Semaphore(self._concurrency)
+        fetches = [
+            asyncio.ensure_future(self._async_fetch(window, semaphore))
+            for window in windows
+        ]
+        window = windows[0]
+        try:
+            # merge in order: the history stays contiguous whatever the order of the responses
+            for window, fetch in zip(windows, fetches):
+                days = await fetch
+                if not days:
+                    # before the start of the Tempo data
+                    _LOGGER.info(
+                        "No Tempo data before %s, history complete", window.end
+                    )
+                    self._worker.merge_history([], API_HISTORY_START)
+                    break
+                self._worker.merge_history(days, window.start)
+            else:
+                _LOGGER.info("Tempo history complete from %s", window.start)
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            OAuthError,
+            BadRequest,
+            ServerError,
+            UnexpectedError,
+            KeyError,
+            ValueError,
+        ) as exc:
+            if (
+                window.start == API_HISTORY_START
+                and classify_error(exc) is ErrorKind.PERMANENT
+            ):
+                # oldest window refused as is: the API does not serve days that old
+                _LOGGER.warning(
+                    "History request %s <> %s refused (%s), history complete",
+                    window.start,
+                    window.end,
+                    exc,
+                )
+                self._worker.merge_history([], API_HISTORY_START)
+            else:
+                self._resume_at = self._clock() + datetime.timedelta(
+                    seconds=API_BACKFILL_RETRY_DELAY
+                )
+                _LOGGER.warning(
+                    "History request %s <> %s failed (%s), resuming after %s",
+                    window.start,
+                    window.end,
+                    repr(exc),
+                    self._resume_at,
+                )
+        finally:
+            for fetch in fetches:
+                if fetch.done() and not fetch.cancelled():
+                    # failures of the windows after the one merging the history last
+                    fetch.exception()
+                else:
+                    fetch.cancel()
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    async def _async_fetch(
+        self, window: BackfillWindow, semaphore: asyncio.Semaphore
+    ) -> list[tuple[datetime.date, str, datetime.datetime]]:
+        async with semaphore:
+            await self._async_wait_turn()
+            _LOGGER.debug("Fetching history %s <> %s", window.start, window.end)
+            return await self._worker.async_fetch_days(window.start, window.end)
+
+    async def _async_wait_turn(self) -> None:
+        """Wait for a history request to be allowed: away from the live fetches and rate limited."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # live fetches first: never hit the API right before (or during) one of them
+            # (a plan already due is not a fetch about to happen: the refresh was missed)
+            plan = self._worker.scheduler.next_fetch
+            if plan is not None and plan.at > self._clock():
+                wait = delay_until(self._clock(), plan.at).total_seconds()
+                if wait < API_BACKFILL_LIVE_GUARD:
+                    await asyncio.sleep(wait + API_BACKFILL_LIVE_GUARD)
+                    continue
+            # rate limit
+            now = loop.time()
+            if now < self._next_request:
+                await asyncio.sleep(self._next_request - now)
+                continue
+            self._next_request = now + self._interval
+            return
@@ -0,0 +1,119 @@
+"""Retry policy of the RTE Tempo API worker: error classification, backoff and circuit breaker."""
+from __future__ import annotations
+
+import datetime
+from enum import Enum
+import logging
+import random
+
+from .api_client import BadRequest
+from .const import (
+    API_CIRCUIT_MAX_DELAY,
+    API_CIRCUIT_OPEN_DELAY,
+    API_RETRY_AFTER_MAX,
+    API_RETRY_FIRST_DELAY,
+    API_RETRY_MAX_DELAY,
+)
+from .token_manager import OAuthError
+
+_LOGGER = logging.getLogger(__name__)
+
+# HTTP codes of the token endpoint meaning the application credentials are invalid
+OAUTH_AUTH_CODES = (400, 401, 403)
+# HTTP codes of the tempo endpoint meaning the access is refused
+API_AUTH_CODES = (401, 403)
+# 4xx HTTP codes of the tempo endpoint worth a quick retry
+API_TRANSIENT_CODES = (408, 429)
+
+
+class ErrorKind(Enum):
+    """Represents the class of a failed fetch."""
+
+    TRANSIENT = "transient"  # network, timeout, throttling or server side: retry soon
+    AUTH = "auth"  # credentials rejected: stop calling the API for a while
+    PERMANENT = "permanent"  # request rejected as is: retrying soon is pointless
+
+
+def classify_error(error: Exception | None) -> ErrorKind:
+    """Classify the error of a failed fetch (None for a fetch without any usable day)."""
+    if isinstance(error, OAuthError):
+        if error.code in OAUTH_AUTH_CODES:
+            return ErrorKind.AUTH
+        return ErrorKind.TRANSIENT
+    if isinstance(error, BadRequest):
+        if error.code in API_AUTH_CODES:
+            return ErrorKind.AUTH
+        if error.code in API_TRANSIENT_CODES:
+            return ErrorKind.TRANSIENT
+        return ErrorKind.PERMANENT
+    # ServerError, UnexpectedError, network errors, timeouts and invalid payloads
+    return ErrorKind.TRANSIENT
+
+
+class RetryPolicy:
+    """Plan the next fetch of the API worker after a failure.
+
+    Transient errors are retried with an exponential backoff (full jitter, the
+    first retry within seconds), a Retry-After asked by the API is honoured and
+    rejected credentials open a circuit breaker: no more request until a trial
+    fetch once the pause is over, each new rejection doubling the pause.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the retry policy."""
+        self._failures = 0
+        self._circuit_openings = 0
+
+    @property
+    def failures(self) -> int:
+        """Return the number of consecutive failed fetches."""
+        return self._failures
+
+    @property
+    def circuit_open(self) -> bool:
+        """Return True if the credentials have been rejected since the last successful fetch."""
+        return self._circuit_openings > 0
+
+    def reset(self) -> None:
+        """Forget the failures (successful fetch or new credentials)."""
+        if self._circuit_openings:
+            _LOGGER.info("Credentials accepted again by the API, circuit breaker closed")
+        self._failures = 0
+        self._circuit_openings = 0
+
+    def record_failure(self, error: Exception | None) -> datetime.timedelta:
+        """Register a failed fetch and return the delay before the next one."""
+        kind = classify_error(error)
+        self._failures += 1
+        if kind is ErrorKind.AUTH:
+            self._circuit_openings += 1
+            delay = min(
+                API_CIRCUIT_OPEN_DELAY * 2 ** min(self._circuit_openings - 1, 8),
+                API_CIRCUIT_MAX_DELAY,
+            )
+        elif kind is ErrorKind.PERMANENT:
+            delay = API_RETRY_MAX_DELAY
+        else:
+            backoff = min(
+                API_RETRY_FIRST_DELAY * 2 ** min(self._failures - 1, 16),
+                API_RETRY_MAX_DELAY,
+            )
+            delay = random.uniform(1, backoff)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, API_RETRY_AFTER_MAX))
+        wait_time = datetime.timedelta(seconds=delay)
+        if kind is ErrorKind.AUTH:
+            _LOGGER.error(
+                "Credentials rejected by the API (%s): circuit breaker open, no request for %s",
+                error,
+                wait_time,
+            )
+        else:
+            _LOGGER.info(
+                "Fetch failed (%s error, %d in a row), retrying in %s",
+                kind.value,
+                self._failures,
+                wait_time,
+            )
+        return wait_time
@@ -1,33 +1,28 @@
 """Sensors for RTE Tempo Calendar integration."""
 from __future__ import annotations
 
-import asyncio
 import datetime
 import logging
+from typing import TYPE_CHECKING
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .api_worker import APIWorker
 from .const import (
     API_ATTRIBUTION,
-    API_REQ_TIMEOUT,
+    API_FIRST_DATA_TIMEOUT,
     API_VALUE_BLUE,
     API_VALUE_RED,
     API_VALUE_WHITE,
-    CYCLE_START_DAY,
-    CYCLE_START_MONTH,
     DEVICE_MANUFACTURER,
     DEVICE_MODEL,
     DEVICE_NAME,
     DOMAIN,
-    FRANCE_TZ,
-    HOUR_OF_CHANGE,
-    OFF_PEAK_START,
     SENSOR_COLOR_BLUE_EMOJI,
     SENSOR_COLOR_BLUE_NAME,
     SENSOR_COLOR_RED_EMOJI,
@@ -39,6 +34,10 @@ from .const import (
     TOTAL_RED_DAYS,
     TOTAL_WHITE_DAYS,
 )
+from .entry_updater import EntryUpdater, TickContext
+
+if TYPE_CHECKING:
+    from .api_worker import APIWorker
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,33 +52,38 @@ async def async_setup_entry(
     _LOGGER.debug("%s: setting up sensor plateform", config_entry.title)
     # Retrieve the API Worker object
     try:
-        api_worker = hass.data[DOMAIN][config_entry.entry_id]
+        entry_data = hass.data[DOMAIN][config_entry.entry_id]
     except KeyError:
         _LOGGER.error(
             "%s: can not calendar: failed to get the API worker object",
             config_entry.title,
         )
         return
-    # Wait request timeout to let API worker get first batch of data before initializing sensors
-    await asyncio.sleep(API_REQ_TIMEOUT)
-    # Init sensors
+    # Wait for the API worker first batch of data before initializing sensors
+    # (sensors are filled in later by the API worker updates if it takes too long)
+    api_worker = entry_data.api_worker
+    if not await api_worker.async_wait_first_data(API_FIRST_DATA_TIMEOUT):
+        _LOGGER.debug("%s: no data yet, adding sensors anyway", config_entry.title)
+    # Init sensors (their states are computed by the entry update pipeline when added)
+    updater = entry_data.updater
     sensors = [
-        CurrentColor(config_entry.entry_id, api_worker, False),
-        CurrentColor(config_entry.entry_id, api_worker, True),
-        NextColor(config_entry.entry_id, api_worker, False),
-        NextColor(config_entry.entry_id, api_worker, True),
-        NextColorTime(config_entry.entry_id),
-        DaysLeft(config_entry.entry_id, api_worker, API_VALUE_BLUE),
-        DaysLeft(config_entry.entry_id, api_worker, API_VALUE_WHITE),
-        DaysLeft(config_entry.entry_id, api_worker, API_VALUE_RED),
-        DaysUsed(config_entry.entry_id, api_worker, API_VALUE_BLUE),
-        DaysUsed(config_entry.entry_id, api_worker, API_VALUE_WHITE),
-        DaysUsed(config_entry.entry_id, api_worker, API_VALUE_RED),
-        NextCycleTime(config_entry.entry_id),
-        OffPeakChangeTime(config_entry.entry_id),
+        CurrentColor(config_entry.entry_id, updater, False),
+        CurrentColor(config_entry.entry_id, updater, True),
+        NextColor(config_entry.entry_id, updater, False),
+        NextColor(config_entry.entry_id, updater, True),
+        NextColorTime(config_entry.entry_id, updater),
+        DaysLeft(config_entry.entry_id, updater, API_VALUE_BLUE),
+        DaysLeft(config_entry.entry_id, updater, API_VALUE_WHITE),
+        DaysLeft(config_entry.entry_id, updater, API_VALUE_RED),
+        DaysUsed(config_entry.entry_id, updater, API_VALUE_BLUE),
+        DaysUsed(config_entry.entry_id, updater, API_VALUE_WHITE),
+        DaysUsed(config_entry.entry_id, updater, API_VALUE_RED),
+        NextCycleTime(config_entry.entry_id, updater),
+        OffPeakChangeTime(config_entry.entry_id, updater),
+        NextFetchTime(config_entry.entry_id, api_worker),
     ]
     # Add the entities to HA
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
 
 
 class CurrentColor(SensorEntity):
@@ -87,12 +91,18 @@ class CurrentColor(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_attribution = API_ATTRIBUTION
     # Sensor properties
     _attr_device_class = SensorDeviceClass.ENUM
     _attr_icon = "mdi:palette"
 
-    def __init__(self, config_id: str, api_worker: APIWorker, visual: bool) -> None:
+    def __init__(
+        self,
+        config_id: str,
+        updater: EntryUpdater,
+        visual: bool,
+    ) -> None:
         """Initialize the Current Color Sensor."""
         # Generic entity properties
         if visual:
@@ -117,7 +127,7 @@ class CurrentColor(SensorEntity):
         self._attr_native_value: str | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
-        self._api_worker = api_worker
+        self._updater = updater
         self._visual = visual
 
     @property
@@ -131,25 +141,30 @@ class CurrentColor(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update the value of the sensor from the thread object memory cache."""
-        localized_now = datetime.datetime.now(FRANCE_TZ)
-        for tempo_day in self._api_worker.get_adjusted_days():
-            if tempo_day.Start <= localized_now < tempo_day.End:
-                # Found a match !
-                self._attr_available = True
-                if self._visual:
-                    self._attr_native_value = get_color_emoji(tempo_day.Value)
-                    self._attr_icon = get_color_icon(tempo_day.Value)
-                else:
-                    self._attr_native_value = get_color_name(tempo_day.Value)
-                return
-        # Nothing found
-        self._attr_available = False
-        self._attr_native_value = None
-        if self._visual:
-            self._attr_icon = "mdi:palette"
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        value = tick.current_color
+        if value is not None:
+            # Found a match !
+            self._attr_available = True
+            if self._visual:
+                self._attr_native_value = get_color_emoji(value)
+                self._attr_icon = get_color_icon(value)
+            else:
+                self._attr_native_value = get_color_name(value)
+        else:
+            # Nothing found
+            self._attr_available = False
+            self._attr_native_value = None
+            if self._visual:
+                self._attr_icon = "mdi:palette"
+        return sensor_state(self) != previous
 
 
 class NextColor(SensorEntity):
@@ -157,12 +172,18 @@ class NextColor(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_attribution = API_ATTRIBUTION
     # Sensor properties
     _attr_device_class = SensorDeviceClass.ENUM
     _attr_icon = "mdi:palette"
 
-    def __init__(self, config_id: str, api_worker: APIWorker, visual: bool) -> None:
+    def __init__(
+        self,
+        config_id: str,
+        updater: EntryUpdater,
+        visual: bool,
+    ) -> None:
         """Initialize the Next Color Sensor."""
         # Generic entity properties
         if visual:
@@ -187,7 +208,7 @@ class NextColor(SensorEntity):
         self._attr_native_value: str | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
-        self._api_worker = api_worker
+        self._updater = updater
         self._visual = visual
 
     @property
@@ -201,28 +222,42 @@ class NextColor(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update the value of the sensor from the thread object memory cache."""
-        localized_now = datetime.datetime.now(FRANCE_TZ)
-        for tempo_day in self._api_worker.get_adjusted_days():
-            if localized_now < tempo_day.Start:
-                # Found a match !
-                self._attr_available = True
-                if self._visual:
-                    self._attr_native_value = get_color_emoji(tempo_day.Value)
-                    self._attr_icon = get_color_icon(tempo_day.Value)
-                else:
-                    self._attr_native_value = get_color_name(tempo_day.Value)
-                return
-        # Special case for emoji
-        if self._visual:
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        value = tick.next_color
+        if value is not None:
+            # Found a match !
+            self._attr_available = True
+            if self._visual:
+                self._attr_native_value = get_color_emoji(value)
+                self._attr_icon = get_color_icon(value)
+            else:
+                self._attr_native_value = get_color_name(value)
+        elif self._visual:
+            # Special case for emoji
             self._attr_available = True
             self._attr_native_value = SENSOR_COLOR_UNKNOWN_EMOJI
             self._attr_icon = "mdi:palette"
         else:
             self._attr_available = False
             self._attr_native_value = None
+        return sensor_state(self) != previous
+
+
+def sensor_state(sensor: SensorEntity) -> tuple:
+    """Return what a sensor writes to the state machine (compared to skip the unchanged writes)."""
+    return (
+        sensor.available,
+        sensor.native_value,
+        sensor.icon,
+        sensor.extra_state_attributes,
+    )
 
 
 def get_color_emoji(value: str) -> str:
@@ -266,11 +301,12 @@ class NextColorTime(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_name = "Prochaine couleur (changement)"
     # Sensor properties
     _attr_device_class = SensorDeviceClass.TIMESTAMP
 
-    def __init__(self, config_id: str) -> None:
+    def __init__(self, config_id: str, updater: EntryUpdater) -> None:
         """Initialize the Next Color Time Remaining Sensor."""
         # Generic entity properties
         self._attr_unique_id = f"{DOMAIN}_{config_id}_next_color_change"
@@ -278,6 +314,7 @@ class NextColorTime(SensorEntity):
         self._attr_native_value: datetime.datetime | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
+        self._updater = updater
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -290,27 +327,16 @@ class NextColorTime(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update the value of the sensor from the thread object memory cache."""
-        localized_now = datetime.datetime.now(FRANCE_TZ)
-        if localized_now.hour >= HOUR_OF_CHANGE:
-            tomorrow = localized_now + datetime.timedelta(days=1)
-            self._attr_native_value = datetime.datetime(
-                year=tomorrow.year,
-                month=tomorrow.month,
-                day=tomorrow.day,
-                hour=HOUR_OF_CHANGE,
-                tzinfo=FRANCE_TZ,
-            )
-        else:
-            self._attr_native_value = datetime.datetime(
-                year=localized_now.year,
-                month=localized_now.month,
-                day=localized_now.day,
-                hour=HOUR_OF_CHANGE,
-                tzinfo=FRANCE_TZ,
-            )
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        self._attr_native_value = tick.next_day_change
+        return sensor_state(self) != previous
 
 
 class DaysLeft(SensorEntity):
@@ -318,12 +344,18 @@ class DaysLeft(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_attribution = API_ATTRIBUTION
     # Sensor properties
     _attr_native_unit_of_measurement = "j"
     _attr_icon = "mdi:timer-sand"
 
-    def __init__(self, config_id: str, api_worker: APIWorker, color: str) -> None:
+    def __init__(
+        self,
+        config_id: str,
+        updater: EntryUpdater,
+        color: str,
+    ) -> None:
         """Initialize the Days Left Sensor."""
         # Generic entity properties
         if color == API_VALUE_BLUE:
@@ -341,7 +373,7 @@ class DaysLeft(SensorEntity):
         self._attr_native_value: int | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
-        self._api_worker = api_worker
+        self._updater = updater
         self._color = color
 
     @property
@@ -355,56 +387,27 @@ class DaysLeft(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update the value of the sensor from the thread object memory cache."""
-        # First compute the number of days this cycle has (handles leap year)
-        localized_now = datetime.datetime.now(tz=FRANCE_TZ)
-        if localized_now.month < CYCLE_START_MONTH:
-            cycle_start = datetime.date(
-                year=localized_now.year - 1,
-                month=CYCLE_START_MONTH,
-                day=CYCLE_START_DAY,
-            )
-            cycle_end = datetime.date(
-                year=localized_now.year, month=CYCLE_START_MONTH, day=CYCLE_START_DAY
-            )
-        else:
-            cycle_start = datetime.date(
-                year=localized_now.year, month=CYCLE_START_MONTH, day=CYCLE_START_DAY
-            )
-            cycle_end = datetime.date(
-                year=localized_now.year + 1,
-                month=CYCLE_START_MONTH,
-                day=CYCLE_START_DAY,
-            )
-        total_days = (cycle_end - cycle_start).days
-        # Now compute how many blue days there is in this cycle
-        total_blue_days = total_days - TOTAL_WHITE_DAYS - TOTAL_RED_DAYS
-        # Count already defined days since the beginning of the cycle
-        nb_blue_days = 0
-        nb_white_days = 0
-        nb_red_days = 0
-        for tempo_day in self._api_worker.get_regular_days():
-            if tempo_day.Start < cycle_start:
-                break
-            if tempo_day.Value == API_VALUE_BLUE:
-                nb_blue_days += 1
-            elif tempo_day.Value == API_VALUE_WHITE:
-                nb_white_days += 1
-            elif tempo_day.Value == API_VALUE_RED:
-                nb_red_days += 1
-            else:
-                raise Exception(f"invalid color {tempo_day.Value}")
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        # Cycle summary is shared by all counters and handles leap years
+        cycle = tick.cycle
         # Now compute remaining days
         if self._color == API_VALUE_BLUE:
-            self._attr_native_value = total_blue_days - nb_blue_days
+            total_blue_days = cycle.TotalDays - TOTAL_WHITE_DAYS - TOTAL_RED_DAYS
+            self._attr_native_value = total_blue_days - cycle.Blue
         elif self._color == API_VALUE_WHITE:
-            self._attr_native_value = TOTAL_WHITE_DAYS - nb_white_days
+            self._attr_native_value = TOTAL_WHITE_DAYS - cycle.White
         elif self._color == API_VALUE_RED:
-            self._attr_native_value = TOTAL_RED_DAYS - nb_red_days
+            self._attr_native_value = TOTAL_RED_DAYS - cycle.Red
         else:
             raise Exception(f"invalid color {self._color}")
+        return sensor_state(self) != previous
 
 
 class DaysUsed(SensorEntity):
@@ -412,12 +415,18 @@ class DaysUsed(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_attribution = API_ATTRIBUTION
     # Sensor properties
     _attr_native_unit_of_measurement = "j"
     _attr_icon = "mdi:timer-sand-complete"
 
-    def __init__(self, config_id: str, api_worker: APIWorker, color: str) -> None:
+    def __init__(
+        self,
+        config_id: str,
+        updater: EntryUpdater,
+        color: str,
+    ) -> None:
         """Initialize the Days Used Sensor."""
         # Generic entity properties
         if color == API_VALUE_BLUE:
@@ -435,7 +444,7 @@ class DaysUsed(SensorEntity):
         self._attr_native_value: int | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
-        self._api_worker = api_worker
+        self._updater = updater
         self._color = color
 
     @property
@@ -449,45 +458,26 @@ class DaysUsed(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update the value of the sensor from the thread object memory cache."""
-        # First compute the number of days this cycle has (handles leap year)
-        localized_now = datetime.datetime.now(tz=FRANCE_TZ)
-        if localized_now.month < CYCLE_START_MONTH:
-            cycle_start = datetime.date(
-                year=localized_now.year - 1,
-                month=CYCLE_START_MONTH,
-                day=CYCLE_START_DAY,
-            )
-        else:
-            cycle_start = datetime.date(
-                year=localized_now.year, month=CYCLE_START_MONTH, day=CYCLE_START_DAY
-            )
-        # Count already defined days since the beginning of the cycle
-        nb_blue_days = 0
-        nb_white_days = 0
-        nb_red_days = 0
-        for tempo_day in self._api_worker.get_regular_days():
-            if tempo_day.Start < cycle_start:
-                break
-            if tempo_day.Value == API_VALUE_BLUE:
-                nb_blue_days += 1
-            elif tempo_day.Value == API_VALUE_WHITE:
-                nb_white_days += 1
-            elif tempo_day.Value == API_VALUE_RED:
-                nb_red_days += 1
-            else:
-                raise Exception(f"invalid color {tempo_day.Value}")
-        # Now compute remaining days
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        # Cycle summary is shared by all counters
+        cycle = tick.cycle
+        # Now compute used days
         if self._color == API_VALUE_BLUE:
-            self._attr_native_value = nb_blue_days
+            self._attr_native_value = cycle.Blue
         elif self._color == API_VALUE_WHITE:
-            self._attr_native_value = nb_white_days
+            self._attr_native_value = cycle.White
         elif self._color == API_VALUE_RED:
-            self._attr_native_value = nb_red_days
+            self._attr_native_value = cycle.Red
         else:
             raise Exception(f"invalid color {self._color}")
+        return sensor_state(self) != previous
 
 
 class NextCycleTime(SensorEntity):
@@ -495,11 +485,12 @@ class NextCycleTime(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_name = "Cycle Prochaine réinitialisation"
     # Sensor properties
     _attr_device_class = SensorDeviceClass.TIMESTAMP
 
-    def __init__(self, config_id: str) -> None:
+    def __init__(self, config_id: str, updater: EntryUpdater) -> None:
         """Initialize the Cycle Time Remaining Sensor."""
         # Generic entity properties
         self._attr_unique_id = f"{DOMAIN}_{config_id}_next_cycle_reinit"
@@ -507,6 +498,7 @@ class NextCycleTime(SensorEntity):
         self._attr_native_value: datetime.datetime | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
+        self._updater = updater
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -519,29 +511,16 @@ class NextCycleTime(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
     @callback
-    def update(self) -> None:
-        """Update the value of the sensor from the thread object memory cache."""
-        localized_now = datetime.datetime.now(tz=FRANCE_TZ)
-        if (
-            localized_now.month >= CYCLE_START_MONTH
-            and localized_now.day >= CYCLE_START_DAY
-        ):
-            self._attr_native_value = datetime.datetime(
-                year=localized_now.year + 1,
-                month=CYCLE_START_MONTH,
-                day=CYCLE_START_DAY,
-                hour=HOUR_OF_CHANGE,
-                tzinfo=localized_now.tzinfo,
-            )
-        else:
-            self._attr_native_value = datetime.datetime(
-                year=localized_now.year,
-                month=CYCLE_START_MONTH,
-                day=CYCLE_START_DAY,
-                hour=HOUR_OF_CHANGE,
-                tzinfo=FRANCE_TZ,
-            )
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        self._attr_native_value = tick.next_cycle_start
+        return sensor_state(self) != previous
 
 
 class OffPeakChangeTime(SensorEntity):
@@ -549,11 +528,12 @@ class OffPeakChangeTime(SensorEntity):
 
     # Generic properties
     _attr_has_entity_name = True
+    _attr_should_poll = False
     _attr_name = "Heures Creuses (changement)"
     # Sensor properties
     _attr_device_class = SensorDeviceClass.TIMESTAMP
 
-    def __init__(self, config_id: str) -> None:
+    def __init__(self, config_id: str, updater: EntryUpdater) -> None:
         """Initialize the Off Peak Change Time Remaining Sensor."""
         # Generic entity properties
         self._attr_unique_id = f"{DOMAIN}_{config_id}_off_peak_change_time"
@@ -561,6 +541,7 @@ class OffPeakChangeTime(SensorEntity):
         self._attr_native_value: datetime.datetime | None = None
         # RTE Tempo Calendar entity properties
         self._config_id = config_id
+        self._updater = updater
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -573,32 +554,72 @@ class OffPeakChangeTime(SensorEntity):
             model=DEVICE_MODEL,
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Register to the entry update pipeline."""
+        self.async_on_remove(self._updater.async_add_entity(self))
+
+    @callback
+    def apply_tick(self, tick: TickContext) -> bool:
+        """Recompute the state from the tick context, return True if it changed."""
+        previous = sensor_state(self)
+        self._attr_native_value = min(tick.next_day_change, tick.next_off_peak_start)
+        return sensor_state(self) != previous
+
+
+class NextFetchTime(SensorEntity):
+    """Next API Fetch Time Diagnostic Sensor Entity."""
+
+    # Generic properties
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_name = "Prochaine requête API"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_icon = "mdi:cloud-clock-outline"
+    # Sensor properties
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    def __init__(self, config_id: str, api_worker: APIWorker) -> None:
+        """Initialize the Next API Fetch Time Sensor."""
+        # Generic entity properties
+        self._attr_unique_id = f"{DOMAIN}_{config_id}_next_fetch_time"
+        # Sensor entity properties
+        self._attr_native_value: datetime.datetime | None = None
+        self._attr_extra_state_attributes = {"reason": None}
+        # RTE Tempo Calendar entity properties
+        self._config_id = config_id
+        self._api_worker = api_worker
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            identifiers={(DOMAIN, self._config_id)},
+            name=DEVICE_NAME,
+            manufacturer=DEVICE_MANUFACTURER,
+            model=DEVICE_MODEL,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register to the fetch scheduler plans."""
+        self.update()
+        self.async_on_remove(
+            self._api_worker.scheduler.async_add_listener(self._handle_new_plan)
+        )
+
+    @callback
+    def _handle_new_plan(self) -> None:
+        """Recompute the value of the sensor when a new fetch is planned."""
+        self.update()
+        self.async_write_ha_state()
+
     @callback
     def update(self) -> None:
-        """Update/Recompute the value of the sensor."""
-        localized_now = datetime.datetime.now(tz=FRANCE_TZ)
-        if localized_now.hour < HOUR_OF_CHANGE:
-            self._attr_native_value = datetime.datetime(
-                year=localized_now.year,
-                month=localized_now.month,
-                day=localized_now.day,
-                hour=HOUR_OF_CHANGE,
-                tzinfo=localized_now.tzinfo,
-            )
-        elif localized_now.hour < OFF_PEAK_START:
-            self._attr_native_value = datetime.datetime(
-                year=localized_now.year,
-                month=localized_now.month,
-                day=localized_now.day,
-                hour=OFF_PEAK_START,
-                tzinfo=localized_now.tzinfo,
-            )
+        """Update the value of the sensor from the fetch scheduler."""
+        plan = self._api_worker.scheduler.next_fetch
+        if plan is None:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {"reason": None}
         else:
-            tomorrow = localized_now + datetime.timedelta(days=1)
-            self._attr_native_value = datetime.datetime(
-                year=tomorrow.year,
-                month=tomorrow.month,
-                day=tomorrow.day,
-                hour=HOUR_OF_CHANGE,
-                tzinfo=tomorrow.tzinfo,
-            )
+            self._attr_native_value = plan.at
+            self._attr_extra_state_attributes = {"reason": plan.reason}
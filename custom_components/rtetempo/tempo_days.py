@@ -0,0 +1,382 @@
+"""Compact storage of the RTE Tempo days."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator
+import datetime
+from itertools import accumulate
+from typing import NamedTuple
+
+from .const import (
+    API_VALUE_BLUE,
+    API_VALUE_RED,
+    API_VALUE_WHITE,
+    CYCLE_START_DAY,
+    CYCLE_START_MONTH,
+    FRANCE_TZ,
+    HOUR_OF_CHANGE,
+)
+
+# Color code 0 means no data for the day
+_NO_DATA = 0
+_KNOWN_VALUES = (API_VALUE_BLUE, API_VALUE_WHITE, API_VALUE_RED)
+
+
+class TempoDay(NamedTuple):
+    """Represents a tempo day."""
+
+    Start: datetime.datetime | datetime.date
+    End: datetime.datetime | datetime.date
+    Value: str
+    Updated: datetime.datetime
+
+
+class CycleSummary(NamedTuple):
+    """Represents the days already placed within a Tempo cycle."""
+
+    Start: datetime.date
+    End: datetime.date
+    TotalDays: int
+    Blue: int
+    White: int
+    Red: int
+
+
+class TempoDaysDiff(NamedTuple):
+    """Represents the days added, changed (value or publication time) and removed between two states of the store."""
+
+    Added: list[datetime.date]
+    Changed: list[datetime.date]
+    Removed: list[datetime.date]
+
+    def empty(self) -> bool:
+        """Check if nothing changed."""
+        return not (self.Added or self.Changed or self.Removed)
+
+
+class TempoDaysStore:
+    """Tempo days indexed by their ordinal: one color code byte and one updated timestamp per day."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._first_ordinal = 0
+        self._colors = bytearray()
+        self._updated = array("d")
+        self._nb_days = 0
+        # color code <-> API value (unknown values get dynamically allocated codes)
+        self._values: list[str | None] = [None, *_KNOWN_VALUES]
+        self._codes: dict[str, int] = {
+            value: code for code, value in enumerate(self._values) if value
+        }
+        # lazily derived views
+        self._prefix_sums: tuple[array, ...] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of days with data."""
+        return self._nb_days
+
+    def copy(self, before: datetime.date | None = None) -> TempoDaysStore:
+        """Return a copy to modify without altering this store, only keeping the days older than a given one if any.
+
+        The derived views are shared with a full copy until it gets modified.
+        """
+        size = len(self._colors)
+        if before is not None:
+            size = min(max(before.toordinal() - self._first_ordinal, 0), size)
+        clone = TempoDaysStore()
+        clone._first_ordinal = self._first_ordinal
+        clone._colors = self._colors[:size]
+        clone._updated = self._updated[:size]
+        clone._values = list(self._values)
+        clone._codes = dict(self._codes)
+        if size == len(self._colors):
+            clone._nb_days = self._nb_days
+            clone._prefix_sums = self._prefix_sums
+        else:
+            clone._nb_days = size - clone._colors.count(_NO_DATA)
+        return clone
+
+    def set_day(
+        self, day: datetime.date, value: str, updated: datetime.datetime
+    ) -> None:
+        """Set (or replace) the value of a day."""
+        ordinal = day.toordinal()
+        if not self._colors:
+            self._first_ordinal = ordinal
+        if ordinal < self._first_ordinal:
+            missing = self._first_ordinal - ordinal
+            self._colors[0:0] = bytes(missing)
+            self._updated[0:0] = array("d", bytes(8 * missing))
+            self._first_ordinal = ordinal
+        index = ordinal - self._first_ordinal
+        if index >= len(self._colors):
+            missing = index + 1 - len(self._colors)
+            self._colors.extend(bytes(missing))
+            self._updated.extend(array("d", bytes(8 * missing)))
+        code = self._get_code(value)
+        timestamp = updated.timestamp()
+        if self._colors[index] == code and self._updated[index] == timestamp:
+            # unchanged: keep the derived views
+            return
+        if self._colors[index] == _NO_DATA:
+            self._nb_days += 1
+        self._colors[index] = code
+        self._updated[index] = timestamp
+        self._invalidate_views()
+
+    def merge(
+        self, days: Iterable[tuple[datetime.date, str, datetime.datetime]]
+    ) -> TempoDaysDiff:
+        """Set (or replace) the values of several days and return the changes."""
+        added: list[datetime.date] = []
+        changed: list[datetime.date] = []
+        for day, value, updated in days:
+            previous = self._get_entry(day.toordinal())
+            self.set_day(day, value, updated)
+            if previous[0] is None:
+                added.append(day)
+            elif previous != (value, updated.timestamp()):
+                changed.append(day)
+        return TempoDaysDiff(added, changed, [])
+
+    def diff(self, previous: TempoDaysStore) -> TempoDaysDiff:
+        """Return the changes from a previous store to this one."""
+        bounds = [
+            (store._first_ordinal, store._first_ordinal + len(store._colors))
+            for store in (self, previous)
+            if store._colors
+        ]
+        added: list[datetime.date] = []
+        changed: list[datetime.date] = []
+        removed: list[datetime.date] = []
+        if not bounds:
+            return TempoDaysDiff(added, changed, removed)
+        for ordinal in range(min(b[0] for b in bounds), max(b[1] for b in bounds)):
+            current = self._get_entry(ordinal)
+            former = previous._get_entry(ordinal)
+            if current == former:
+                continue
+            day = datetime.date.fromordinal(ordinal)
+            if former[0] is None:
+                added.append(day)
+            elif current[0] is None:
+                removed.append(day)
+            else:
+                changed.append(day)
+        return TempoDaysDiff(added, changed, removed)
+
+    def remove_before(self, day: datetime.date) -> list[datetime.date]:
+        """Remove all days older than the given one and return them."""
+        index = min(day.toordinal() - self._first_ordinal, len(self._colors))
+        if index <= 0:
+            return []
+        removed = [
+            datetime.date.fromordinal(self._first_ordinal + offset)
+            for offset in range(index)
+            if self._colors[offset] != _NO_DATA
+        ]
+        self._nb_days -= len(removed)
+        del self._colors[:index]
+        del self._updated[:index]
+        self._first_ordinal += index
+        self._invalidate_views()
+        return removed
+
+    def oldest_day(self) -> datetime.date | None:
+        """Return the oldest day with data."""
+        for index, code in enumerate(self._colors):
+            if code != _NO_DATA:
+                return datetime.date.fromordinal(self._first_ordinal + index)
+        return None
+
+    def newest_day(self) -> datetime.date | None:
+        """Return the newest day with data."""
+        for index in range(len(self._colors) - 1, -1, -1):
+            if self._colors[index] != _NO_DATA:
+                return datetime.date.fromordinal(self._first_ordinal + index)
+        return None
+
+    def color_for_date(self, day: datetime.date) -> str | None:
+        """Return the value of a (regular) day."""
+        index = day.toordinal() - self._first_ordinal
+        if 0 <= index < len(self._colors):
+            return self._values[self._colors[index]]
+        return None
+
+    def color_at(self, instant: datetime.datetime) -> str | None:
+        """Return the value of the tempo day running at a given instant (tempo days start at 6h)."""
+        return self.color_for_date(tempo_date(instant))
+
+    def next_known_day(self, day: datetime.date) -> datetime.date | None:
+        """Return the first day with data after the given one."""
+        start = max(day.toordinal() + 1 - self._first_ordinal, 0)
+        for index in range(start, len(self._colors)):
+            if self._colors[index] != _NO_DATA:
+                return datetime.date.fromordinal(self._first_ordinal + index)
+        return None
+
+    def tempo_day(self, day: datetime.date, adjusted: bool) -> TempoDay | None:
+        """Return a tempo day, either adjusted (6h to 6h) or regular (all day)."""
+        index = day.toordinal() - self._first_ordinal
+        if not 0 <= index < len(self._colors) or self._colors[index] == _NO_DATA:
+            return None
+        return self._forge_tempo_day(index, adjusted)
+
+    def days(self) -> Iterator[tuple[datetime.date, str, datetime.datetime]]:
+        """Iterate over the days with data, oldest first."""
+        for index, code in enumerate(self._colors):
+            if code != _NO_DATA:
+                yield (
+                    datetime.date.fromordinal(self._first_ordinal + index),
+                    str(self._values[code]),
+                    datetime.datetime.fromtimestamp(self._updated[index], FRANCE_TZ),
+                )
+
+    def iter_range(
+        self, first: datetime.date, last: datetime.date
+    ) -> Iterator[tuple[datetime.date, str, float]]:
+        """Iterate over the days with data between two dates (included) with their updated POSIX timestamp."""
+        start = max(first.toordinal() - self._first_ordinal, 0)
+        stop = min(last.toordinal() + 1 - self._first_ordinal, len(self._colors))
+        for index in range(start, stop):
+            code = self._colors[index]
+            if code != _NO_DATA:
+                yield (
+                    datetime.date.fromordinal(self._first_ordinal + index),
+                    str(self._values[code]),
+                    self._updated[index],
+                )
+
+    def count_colors(
+        self, first: datetime.date, last: datetime.date
+    ) -> tuple[int, int, int]:
+        """Count the blue, white and red days between two dates (included) without scanning them."""
+        size = len(self._colors)
+        start = min(max(first.toordinal() - self._first_ordinal, 0), size)
+        stop = min(max(last.toordinal() + 1 - self._first_ordinal, 0), size)
+        if stop <= start:
+            return (0, 0, 0)
+        blue, white, red = (
+            prefix_sum[stop] - prefix_sum[start]
+            for prefix_sum in self._get_prefix_sums()
+        )
+        return (blue, white, red)
+
+    def cycle_summary(self, day: datetime.date) -> CycleSummary:
+        """Return the summary of the Tempo cycle containing a given day."""
+        cycle_start, cycle_end = cycle_bounds(day)
+        blue, white, red = self.count_colors(
+            cycle_start, cycle_end - datetime.timedelta(days=1)
+        )
+        return CycleSummary(
+            Start=cycle_start,
+            End=cycle_end,
+            TotalDays=(cycle_end - cycle_start).days,
+            Blue=blue,
+            White=white,
+            Red=red,
+        )
+
+    def _get_code(self, value: str) -> int:
+        try:
+            return self._codes[value]
+        except KeyError:
+            self._values.append(value)
+            self._codes[value] = len(self._values) - 1
+            return self._codes[value]
+
+    def _get_entry(self, ordinal: int) -> tuple[str | None, float]:
+        """Return the value and the updated timestamp of a day (None and 0 if no data)."""
+        index = ordinal - self._first_ordinal
+        if 0 <= index < len(self._colors) and self._colors[index] != _NO_DATA:
+            return self._values[self._colors[index]], self._updated[index]
+        return None, 0.0
+
+    def _invalidate_views(self) -> None:
+        self._prefix_sums = None
+
+    def _get_prefix_sums(self) -> tuple[array, ...]:
+        # one cumulative count per known color (count of the days before each index)
+        if self._prefix_sums is None:
+            self._prefix_sums = tuple(
+                array(
+                    "I",
+                    accumulate(
+                        (color == self._codes[value] for color in self._colors),
+                        initial=0,
+                    ),
+                )
+                for value in _KNOWN_VALUES
+            )
+        return self._prefix_sums
+
+    def _forge_tempo_day(self, index: int, adjusted: bool) -> TempoDay:
+        day = datetime.date.fromordinal(self._first_ordinal + index)
+        value = str(self._values[self._colors[index]])
+        updated = datetime.datetime.fromtimestamp(self._updated[index], FRANCE_TZ)
+        return forge_tempo_days(day, value, updated)[0 if adjusted else 1]
+
+
+class TempoSnapshot(NamedTuple):
+    """Represents a consistent state of the data published by the API worker.
+
+    A snapshot is never modified once published: the worker builds the next
+    one aside and swaps the reference, readers holding a snapshot keep a
+    consistent view of the days, their derived views (memoized on first read),
+    the cycle summary and the option flags.
+    """
+
+    days: TempoDaysStore
+    generation: int
+    fetched_at: datetime.datetime | None
+    cycle: CycleSummary | None  # of the tempo day at publication time
+    adjusted_entries: frozenset[str]  # config entries with the adjusted days option
+
+    def adjusted(self, entry_id: str) -> bool:
+        """Return the adjusted days option of a config entry."""
+        return entry_id in self.adjusted_entries
+
+    def cycle_summary(self, localized_now: datetime.datetime) -> CycleSummary:
+        """Return the summary of the current cycle (computed at publication time unless a new cycle started since)."""
+        today = tempo_date(localized_now)
+        if self.cycle is not None and self.cycle.Start <= today < self.cycle.End:
+            return self.cycle
+        return self.days.cycle_summary(today)
+
+
+def cycle_bounds(day: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """Return the first day of the Tempo cycle containing a given day and the first day of the next one."""
+    cycle_start = datetime.date(
+        year=day.year, month=CYCLE_START_MONTH, day=CYCLE_START_DAY
+    )
+    if day < cycle_start:
+        cycle_start = cycle_start.replace(year=day.year - 1)
+    return cycle_start, cycle_start.replace(year=cycle_start.year + 1)
+
+
+def tempo_date(instant: datetime.datetime) -> datetime.date:
+    """Return the date of the tempo day running at a given instant."""
+    localized = instant.astimezone(FRANCE_TZ)
+    if localized.hour < HOUR_OF_CHANGE:
+        return localized.date() - datetime.timedelta(days=1)
+    return localized.date()
+
+
+def forge_tempo_days(
+    day: datetime.date, value: str, updated: datetime.datetime
+) -> tuple[TempoDay, TempoDay]:
+    """Forge both the adjusted (6h to 6h) and the regular (all day) tempo days of a date."""
+    next_day = day + datetime.timedelta(days=1)
+    return (
+        TempoDay(
+            Start=datetime.datetime.combine(
+                day, datetime.time(hour=HOUR_OF_CHANGE, tzinfo=FRANCE_TZ)
+            ),
+            End=datetime.datetime.combine(
+                next_day, datetime.time(hour=HOUR_OF_CHANGE, tzinfo=FRANCE_TZ)
+            ),
+            Value=value,
+            Updated=updated,
+        ),
+        TempoDay(Start=day, End=next_day, Value=value, Updated=updated),
+    )
@@ -0,0 +1,273 @@
+"""OAuth2 access token manager for RTE Tempo Calendar."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import datetime
+import json
+import logging
+import random
+import time
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    API_REQ_TIMEOUT,
+    API_TOKEN_ENDPOINT,
+    API_TOKEN_EXPIRES_AT,
+    API_TOKEN_EXPIRY_MARGIN,
+    API_TOKEN_KEY_ACCESS,
+    API_TOKEN_KEY_EXPIRES_IN,
+    API_TOKEN_OBTAINED_AT,
+    API_TOKEN_RENEWAL_JITTER,
+    API_TOKEN_RENEWAL_LEAD,
+    STORE_KEY_TOKEN_ENTRY,
+    USER_AGENT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """Hold the application credentials of each config entry and keep an access token ready for the active one."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: aiohttp.ClientSession,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the token manager (clock returns the current POSIX timestamp)."""
+        self._hass = hass
+        self._session = session
+        self._clock = clock
+        # one set of credentials per config entry, the active one is used until it fails
+        self._credentials: dict[str, aiohttp.BasicAuth] = {}
+        self._active_credentials: str | None = None
+        # current access token (and the config entry whose credentials issued it)
+        self._token: dict[str, Any] = {}
+        self._token_entry: str | None = None
+        self._lock = asyncio.Lock()
+        self._unsub_renewal: CALLBACK_TYPE | None = None
+        self._refresh_count = 0
+        # called each time a new token is obtained (to persist it)
+        self.on_renewal: CALLBACK_TYPE | None = None
+
+    @property
+    def nb_credentials(self) -> int:
+        """Return the number of registered credentials."""
+        return len(self._credentials)
+
+    @property
+    def refresh_count(self) -> int:
+        """Return the number of access tokens fetched since startup."""
+        return self._refresh_count
+
+    @property
+    def token_age(self) -> float | None:
+        """Return the age of the current access token in seconds."""
+        if not self._token:
+            return None
+        return self._clock() - self._token[API_TOKEN_OBTAINED_AT]
+
+    @property
+    def expires_at(self) -> float:
+        """Return the expiration POSIX timestamp of the current access token (0 if none)."""
+        if not self._token or self._token_entry != self._active_credentials:
+            return 0
+        return self._token[API_TOKEN_EXPIRES_AT]
+
+    @callback
+    def add_credentials(self, entry_id: str, client_id: str, client_secret: str):
+        """Register the application credentials of a config entry."""
+        self._credentials[entry_id] = aiohttp.BasicAuth(client_id, client_secret)
+        if self._active_credentials is None or (
+            # prefer the credentials of the restored token
+            entry_id == self._token_entry
+            and self._active_credentials != self._token_entry
+        ):
+            self._active_credentials = entry_id
+
+    @callback
+    def remove_credentials(self, entry_id: str) -> int:
+        """Unregister the credentials of a config entry and return the number of entries still registered."""
+        self._credentials.pop(entry_id, None)
+        if self._active_credentials == entry_id:
+            # the token is kept (and persisted) but only used again with the credentials that issued it
+            self._active_credentials = next(iter(self._credentials), None)
+        return len(self._credentials)
+
+    @callback
+    def adopt(self, entry_id: str, token: dict[str, Any]) -> None:
+        """Use an access token fetched elsewhere with the credentials of a config entry."""
+        if entry_id != self._active_credentials:
+            return
+        self._token = token
+        self._token_entry = entry_id
+        self._refresh_count += 1
+
+    @callback
+    def invalidate(self) -> None:
+        """Forget the current access token (rejected by the API)."""
+        self._token = {}
+        self._token_entry = None
+
+    @callback
+    def failover(self, reason: Exception) -> bool:
+        """Switch to the credentials of the next config entry, if any."""
+        entry_ids = list(self._credentials)
+        if len(entry_ids) < 2 or self._active_credentials not in entry_ids:
+            return False
+        index = entry_ids.index(self._active_credentials)
+        self._active_credentials = entry_ids[(index + 1) % len(entry_ids)]
+        self.invalidate()
+        _LOGGER.warning(
+            "Credentials of config entry %s failed (%s), switching to the ones of config entry %s",
+            entry_ids[index],
+            reason,
+            self._active_credentials,
+        )
+        return True
+
+    async def async_get_access_token(self) -> str:
+        """Return a valid access token, only fetching a new one if the current one is about to expire."""
+        if self.expires_at - API_TOKEN_EXPIRY_MARGIN < self._clock():
+            await self._async_renew()
+        return self._token[API_TOKEN_KEY_ACCESS]
+
+    @callback
+    def schedule_renewal(self, needed_at: datetime.datetime) -> None:
+        """Renew the access token in the background ahead of its next use if it will have expired by then."""
+        self._cancel_renewal()
+        if self.expires_at - API_TOKEN_EXPIRY_MARGIN >= needed_at.timestamp():
+            return
+        renewal = needed_at - datetime.timedelta(
+            seconds=API_TOKEN_RENEWAL_LEAD + random.uniform(0, API_TOKEN_RENEWAL_JITTER)
+        )
+        _LOGGER.debug("Access token renewal scheduled at %s", renewal)
+        self._unsub_renewal = async_call_later(
+            self._hass,
+            max(renewal.timestamp() - self._clock(), 0),
+            self._handle_renewal,
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the pending renewal."""
+        self._cancel_renewal()
+
+    def restore(self, data: dict[str, Any] | None) -> None:
+        """Restore a persisted access token (must be called before registering credentials)."""
+        if not data:
+            return
+        try:
+            token = dict(data)
+            entry_id = str(token.pop(STORE_KEY_TOKEN_ENTRY))
+            expires_at = float(token[API_TOKEN_EXPIRES_AT])
+            float(token[API_TOKEN_OBTAINED_AT])
+            str(token[API_TOKEN_KEY_ACCESS])
+        except (KeyError, TypeError, ValueError) as exc:
+            _LOGGER.warning(
+                "Persisted access token is invalid, discarding it: %s", repr(exc)
+            )
+            return
+        if expires_at - API_TOKEN_EXPIRY_MARGIN < self._clock():
+            _LOGGER.debug("Persisted access token has expired, discarding it")
+            return
+        self._token = token
+        self._token_entry = entry_id
+
+    def as_dict(self) -> dict[str, Any] | None:
+        """Return the current access token to be persisted."""
+        if not self._token:
+            return None
+        return {**self._token, STORE_KEY_TOKEN_ENTRY: self._token_entry}
+
+    async def _async_renew(self) -> None:
+        async with self._lock:
+            # another caller may have renewed it while we were waiting for the lock
+            if self.expires_at - API_TOKEN_EXPIRY_MARGIN >= self._clock():
+                return
+            entry_id = self._active_credentials
+            if entry_id is None:
+                raise OAuthError("no credentials available")
+            _LOGGER.debug("Requesting access token")
+            try:
+                token = await async_fetch_token(
+                    self._session, self._credentials[entry_id], self._clock()
+                )
+            except OAuthError as exc:
+                _LOGGER.error("Fetching OAuth2 access token failed: %s", exc)
+                raise
+            if entry_id != self._active_credentials:
+                # credentials removed or failed over meanwhile
+                raise OAuthError("credentials changed while fetching the access token")
+            self._token = token
+            self._token_entry = entry_id
+            self._refresh_count += 1
+        if self.on_renewal:
+            self.on_renewal()
+
+    async def _async_background_renew(self) -> None:
+        try:
+            await self._async_renew()
+        except (aiohttp.ClientError, asyncio.TimeoutError, OAuthError) as exc:
+            # the next data fetch will try again on its own
+            _LOGGER.warning("Background access token renewal failed: %s", repr(exc))
+
+    @callback
+    def _handle_renewal(self, _: datetime.datetime) -> None:
+        self._unsub_renewal = None
+        self._hass.async_create_background_task(
+            self._async_background_renew(), "rtetempo_token_renewal"
+        )
+
+    @callback
+    def _cancel_renewal(self) -> None:
+        if self._unsub_renewal is not None:
+            self._unsub_renewal()
+            self._unsub_renewal = None
+
+
+async def async_fetch_token(
+    session: aiohttp.ClientSession,
+    auth: aiohttp.BasicAuth,
+    obtained_at: float | None = None,
+) -> dict[str, Any]:
+    """Fetch an OAuth2 access token using the client credentials grant (obtained_at defaults to now)."""
+    async with session.post(
+        API_TOKEN_ENDPOINT,
+        auth=auth,
+        data={"grant_type": "client_credentials"},
+        timeout=aiohttp.ClientTimeout(total=API_REQ_TIMEOUT),
+        headers={"User-Agent": USER_AGENT},
+    ) as response:
+        text = await response.text()
+    if response.status != 200:
+        raise OAuthError(f"HTTP code {response.status}: {text}", response.status)
+    try:
+        token = json.loads(text)
+        token[API_TOKEN_OBTAINED_AT] = (
+            time.time() if obtained_at is None else obtained_at
+        )
+        token[API_TOKEN_EXPIRES_AT] = token[API_TOKEN_OBTAINED_AT] + float(
+            token[API_TOKEN_KEY_EXPIRES_IN]
+        )
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        raise OAuthError(f"Invalid access token payload: {text}") from exc
+    if API_TOKEN_KEY_ACCESS not in token:
+        raise OAuthError(f"No access token within payload: {text}")
+    return token
+
+
+class OAuthError(Exception):
+    """Represents a failure to get an OAuth2 access token."""
+
+    def __init__(self, message: str, code: int | None = None) -> None:
+        """Initialize the OAuthError exception (code is the HTTP code of the token endpoint, if any)."""
+        self.code = code
+        super().__init__(message)
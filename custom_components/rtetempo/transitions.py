@@ -0,0 +1,126 @@
+"""Transition scheduler for RTE Tempo Calendar time derived entities."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+import datetime
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+
+from .const import (
+    CYCLE_START_DAY,
+    CYCLE_START_MONTH,
+    FRANCE_TZ,
+    HOUR_OF_CHANGE,
+    OFF_PEAK_START,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+TRANSITION_DAY_CHANGE = "day_change"
+TRANSITION_OFF_PEAK_START = "off_peak_start"
+TRANSITION_CYCLE_START = "cycle_start"
+
+
+class TransitionScheduler:
+    """Arm a single timer on the next Tempo boundary and only update the entities concerned by it."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the transition scheduler."""
+        self._hass = hass
+        self._listeners: dict[CALLBACK_TYPE, frozenset[str]] = {}
+        self._next_transitions: frozenset[str] = frozenset()
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, transitions: Iterable[str]
+    ) -> CALLBACK_TYPE:
+        """Listen for the given transitions."""
+        self._listeners[update_callback] = frozenset(transitions)
+        if self._unsub_timer is None:
+            self._schedule()
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._listeners.pop(update_callback, None)
+            if not self._listeners:
+                self.async_shutdown()
+
+        return remove_listener
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the pending timer."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _schedule(self) -> None:
+        instant, self._next_transitions = next_transition(
+            datetime.datetime.now(FRANCE_TZ)
+        )
+        _LOGGER.debug(
+            "Next transition(s) %s scheduled at %s",
+            ", ".join(sorted(self._next_transitions)),
+            instant,
+        )
+        self._unsub_timer = async_track_point_in_time(
+            self._hass, self._handle_transition, instant
+        )
+
+    @callback
+    def _handle_transition(self, _: datetime.datetime) -> None:
+        transitions = self._next_transitions
+        # arm the next timer first for the entities to see the new boundary
+        self._schedule()
+        for update_callback, listened in list(self._listeners.items()):
+            if listened & transitions:
+                update_callback()
+
+
+def next_transition(
+    localized_now: datetime.datetime,
+) -> tuple[datetime.datetime, frozenset[str]]:
+    """Return the next boundary instant strictly after now and the transitions happening at it."""
+    candidates: dict[datetime.datetime, set[str]] = {}
+    for instant, transition in (
+        (next_wall_clock(localized_now, HOUR_OF_CHANGE), TRANSITION_DAY_CHANGE),
+        (next_wall_clock(localized_now, OFF_PEAK_START), TRANSITION_OFF_PEAK_START),
+        (next_cycle_start(localized_now), TRANSITION_CYCLE_START),
+    ):
+        candidates.setdefault(instant, set()).add(transition)
+    instant = min(candidates)
+    return instant, frozenset(candidates[instant])
+
+
+def next_wall_clock(localized_now: datetime.datetime, hour: int) -> datetime.datetime:
+    """Return the next occurrence of a France wall clock hour strictly after now (DST aware)."""
+    local_date = localized_now.astimezone(FRANCE_TZ).date()
+    candidate = datetime.datetime.combine(
+        local_date, datetime.time(hour=hour, tzinfo=FRANCE_TZ)
+    )
+    if candidate <= localized_now:
+        candidate = datetime.datetime.combine(
+            local_date + datetime.timedelta(days=1),
+            datetime.time(hour=hour, tzinfo=FRANCE_TZ),
+        )
+    return candidate
+
+
+def next_cycle_start(localized_now: datetime.datetime) -> datetime.datetime:
+    """Return the next Tempo cycle start strictly after now."""
+    year = localized_now.astimezone(FRANCE_TZ).year
+    candidate = datetime.datetime(
+        year=year,
+        month=CYCLE_START_MONTH,
+        day=CYCLE_START_DAY,
+        hour=HOUR_OF_CHANGE,
+        tzinfo=FRANCE_TZ,
+    )
+    if candidate <= localized_now:
+        candidate = candidate.replace(year=year + 1)
+    return candidate
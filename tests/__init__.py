@@ -0,0 +1 @@
+"""Tests of the RTE Tempo Calendar integration."""
@@ -0,0 +1,30 @@
+"""Fixtures of the RTE Tempo Calendar tests: a bare Home Assistant instance using the RTE API stand-in."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tools"))
+
+# pylint: disable=wrong-import-position
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from ha_harness import async_hass_with_standin  # noqa: E402
+from rte_standin import RTEStandIn  # noqa: E402
+
+
+@pytest.fixture
+def standin() -> RTEStandIn:
+    """Return a RTE API stand-in (started by the hass fixture)."""
+    return RTEStandIn()
+
+
+@pytest_asyncio.fixture
+async def hass(standin: RTEStandIn) -> AsyncIterator[HomeAssistant]:
+    """Run a bare Home Assistant instance using the stand-in as RTE API."""
+    async with async_hass_with_standin(standin) as instance:
+        yield instance
@@ -0,0 +1,165 @@
+"""Timings of the integration hot paths (pytest-benchmark), with a budget each.
+
+The budgets are an order of magnitude above the timings on a laptop: they
+catch a complexity regression (a scan instead of an indexed lookup, a cache
+no longer hit), not a slower CI runner. Run with --benchmark-disable to only
+check the results.
+"""
+from __future__ import annotations
+
+from collections.abc import Coroutine
+import datetime
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.rtetempo.api_worker import (
+    parse_rte_api_date,
+    parse_rte_api_datetime,
+    parse_rte_api_days,
+)
+from custom_components.rtetempo.binary_sensor import OffPeakHours
+from custom_components.rtetempo.calendar import TempoCalendar
+from custom_components.rtetempo.const import (
+    API_HISTORY_DAYS,
+    API_VALUE_BLUE,
+    API_VALUE_RED,
+    API_VALUE_WHITE,
+    DOMAIN,
+    FRANCE_TZ,
+    OPTION_ADJUSTED_DAYS,
+)
+from custom_components.rtetempo.entry_updater import forge_tick
+from custom_components.rtetempo.fetch_scheduler import FetchScheduler
+from custom_components.rtetempo.sensor import (
+    CurrentColor,
+    DaysLeft,
+    DaysUsed,
+    NextColor,
+    NextColorTime,
+    NextCycleTime,
+    OffPeakChangeTime,
+)
+
+from ha_harness import forge_entry
+from rte_standin import RTEStandIn
+
+pytest.importorskip("pytest_benchmark")
+
+
+def check_budget(benchmark, seconds: float) -> None:
+    """Check the best timing of a benchmark against its budget."""
+    if benchmark.disabled:
+        return
+    assert benchmark.stats.stats.min < seconds
+
+
+def run_sync(coro: Coroutine):
+    """Run a coroutine which never suspends and return its result."""
+    try:
+        coro.send(None)
+    except StopIteration as result:
+        return result.value
+    coro.close()
+    raise AssertionError("coroutine suspended")
+
+
+async def setup_entry(hass: HomeAssistant, standin: RTEStandIn, options=None):
+    """Add a config entry and return it with its worker and updater."""
+    entry = forge_entry(standin, options=options)
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    return entry, entry_data.api_worker, entry_data.updater
+
+
+def test_parse_days(benchmark, standin: RTEStandIn) -> None:
+    """Parse a full retention window payload, caches cleared."""
+    today = datetime.date.today()
+    values = standin.tempo_values(
+        today - datetime.timedelta(days=API_HISTORY_DAYS),
+        today + datetime.timedelta(days=2),
+    )
+
+    def clear_caches() -> None:
+        parse_rte_api_date.cache_clear()
+        parse_rte_api_datetime.cache_clear()
+
+    days = benchmark.pedantic(
+        parse_rte_api_days, args=(values,), setup=clear_caches, rounds=20
+    )
+    assert len(days) == len(values)
+    check_budget(benchmark, 0.010)
+
+
+def test_plan(benchmark) -> None:
+    """Plan the next fetch over a day of wall clock times."""
+    scheduler = FetchScheduler()
+    today = datetime.datetime.combine(
+        datetime.date.today(), datetime.time(tzinfo=FRANCE_TZ)
+    )
+    instants = [
+        today + datetime.timedelta(minutes=minutes) for minutes in range(0, 1440, 10)
+    ]
+    ends = (today + datetime.timedelta(days=1), today + datetime.timedelta(days=2))
+
+    def plan():
+        return [scheduler.plan(instant, end) for instant in instants for end in ends]
+
+    plans = benchmark(plan)
+    assert len(plans) == 2 * len(instants)
+    check_budget(benchmark, len(plans) * 200e-6)
+
+
+@pytest.mark.parametrize("nb_days", [1, 31, 365])
+@pytest.mark.parametrize("adjusted", [False, True])
+async def test_calendar_events(
+    benchmark, hass: HomeAssistant, standin: RTEStandIn, nb_days: int, adjusted: bool
+) -> None:
+    """Look up the calendar events over a range."""
+    entry, worker, updater = await setup_entry(
+        hass, standin, {OPTION_ADJUSTED_DAYS: adjusted}
+    )
+    calendar = TempoCalendar(worker, updater, entry)
+    now = datetime.datetime.now(FRANCE_TZ)
+    start = now - datetime.timedelta(days=nb_days - 1)
+    events = benchmark(
+        lambda: run_sync(calendar.async_get_events(hass, start, now))
+    )
+    assert nb_days - 1 <= len(events) <= nb_days
+    check_budget(benchmark, 0.001 + nb_days * 20e-6)
+
+
+async def test_forge_tick(benchmark, hass: HomeAssistant, standin: RTEStandIn) -> None:
+    """Compute the tick context of an entry."""
+    entry, worker, _ = await setup_entry(hass, standin)
+    now = datetime.datetime.now(FRANCE_TZ)
+    tick = benchmark(forge_tick, now, worker.snapshot, entry.entry_id)
+    assert tick.current_color is not None
+    check_budget(benchmark, 200e-6)
+
+
+async def test_apply_tick(benchmark, hass: HomeAssistant, standin: RTEStandIn) -> None:
+    """Apply a tick context to all the entities of an entry."""
+    entry, worker, updater = await setup_entry(hass, standin)
+    entry_id = entry.entry_id
+    tick = forge_tick(datetime.datetime.now(FRANCE_TZ), worker.snapshot, entry_id)
+    entities = [
+        CurrentColor(entry_id, updater, False),
+        NextColor(entry_id, updater, False),
+        NextColorTime(entry_id, updater),
+        DaysLeft(entry_id, updater, API_VALUE_BLUE),
+        DaysLeft(entry_id, updater, API_VALUE_WHITE),
+        DaysUsed(entry_id, updater, API_VALUE_RED),
+        NextCycleTime(entry_id, updater),
+        OffPeakChangeTime(entry_id, updater),
+        OffPeakHours(entry_id, updater),
+    ]
+
+    def apply_tick():
+        return [entity.apply_tick(tick) for entity in entities]
+
+    benchmark(apply_tick)
+    assert CurrentColor(entry_id, updater, False).apply_tick(tick)
+    check_budget(benchmark, len(entities) * 50e-6)
@@ -0,0 +1,129 @@
+"""Next fetch planning on the France wall clock."""
+from __future__ import annotations
+
+import datetime
+import random
+
+import pytest
+
+from custom_components.rtetempo.const import FRANCE_TZ
+from custom_components.rtetempo.fetch_scheduler import (
+    DEFAULT_JITTER,
+    FETCH_REASON_ANNOUNCEMENT,
+    FETCH_REASON_ANNOUNCEMENT_WINDOW,
+    FETCH_REASON_CONFIRMATION,
+    FETCH_REASON_DAY_CHANGE,
+    FETCH_REASON_NEXT_DAY,
+    FETCH_REASON_RETRY,
+    FETCH_REASON_UNEXPECTED,
+    FetchScheduler,
+    announcement_confirmed,
+    delay_until,
+)
+
+DAY = datetime.date(2024, 1, 15)
+PREVIOUS_DAY = DAY - datetime.timedelta(days=1)
+NEXT_DAY = DAY + datetime.timedelta(days=1)
+
+
+def at(day: datetime.date, hour: int, minute: int = 0, second: int = 0):
+    """Return a France wall clock time."""
+    return datetime.datetime.combine(
+        day, datetime.time(hour, minute, second, tzinfo=FRANCE_TZ)
+    )
+
+
+def data_end(day: datetime.date, days_ahead: int) -> datetime.datetime:
+    """Return the end of data fetched up to some days after a day (excluded)."""
+    return at(day + datetime.timedelta(days=days_ahead), 0)
+
+
+@pytest.mark.parametrize(
+    ("now", "days_ahead", "updated", "expected_at", "expected_reason"),
+    [
+        # next day color published early: confirm it
+        (at(DAY, 8), 2, None, at(DAY, 11), FETCH_REASON_CONFIRMATION),
+        (at(DAY, 10, 39), 2, at(DAY, 7), at(DAY, 11), FETCH_REASON_CONFIRMATION),
+        # next day color published for good: wait for the day change
+        (at(DAY, 10, 40), 2, at(DAY, 10, 40), at(NEXT_DAY, 6), FETCH_REASON_NEXT_DAY),
+        (at(DAY, 8), 2, at(PREVIOUS_DAY, 7), at(NEXT_DAY, 6), FETCH_REASON_NEXT_DAY),
+        (at(DAY, 11, 30), 2, None, at(NEXT_DAY, 6), FETCH_REASON_NEXT_DAY),
+        # next day color unknown before the day change: one second after it
+        (at(DAY, 3), 1, None, at(DAY, 6, 0, 1), FETCH_REASON_DAY_CHANGE),
+        # not announced yet: sparse polls until the announcement window
+        (at(DAY, 6, 0, 1), 1, None, at(DAY, 8, 0, 1), FETCH_REASON_ANNOUNCEMENT),
+        (at(DAY, 9), 1, None, at(DAY, 10, 30), FETCH_REASON_ANNOUNCEMENT),
+        # within the announcement window
+        (at(DAY, 10, 30), 1, None, at(DAY, 10, 40), FETCH_REASON_ANNOUNCEMENT_WINDOW),
+        (at(DAY, 12, 55), 1, None, at(DAY, 13, 5), FETCH_REASON_ANNOUNCEMENT_WINDOW),
+        # past the announcement window
+        (at(DAY, 13), 1, None, at(DAY, 13, 30), FETCH_REASON_ANNOUNCEMENT),
+        # neither up to today nor tomorrow
+        (at(DAY, 8), 0, None, at(DAY, 9), FETCH_REASON_UNEXPECTED),
+        (at(DAY, 8), 3, None, at(DAY, 9), FETCH_REASON_UNEXPECTED),
+    ],
+)
+def test_plan(now, days_ahead, updated, expected_at, expected_reason) -> None:
+    """Each data state gets its deadline and reason."""
+    plan = FetchScheduler(jitter={}).plan(now, data_end(now.date(), days_ahead), updated)
+    assert plan.reason == expected_reason
+    assert plan.at == expected_at
+
+
+@pytest.mark.parametrize(
+    ("day", "expected_delay"),
+    [
+        # spring forward: 01:00 CET to 06:00 CEST is 4 hours
+        (datetime.date(2024, 3, 31), datetime.timedelta(hours=4, seconds=1)),
+        # fall back: 01:00 CEST to 06:00 CET is 6 hours
+        (datetime.date(2024, 10, 27), datetime.timedelta(hours=6, seconds=1)),
+    ],
+)
+def test_plan_across_dst_change(day, expected_delay) -> None:
+    """The day change deadline stays at 6h on the wall clock across DST changes."""
+    now = at(day, 1)
+    plan = FetchScheduler(jitter={}).plan(now, data_end(day, 1))
+    assert plan.at == at(day, 6, 0, 1)
+    assert delay_until(now, plan.at) == expected_delay
+
+
+def test_default_jitter_bounds() -> None:
+    """The default jitter never plans a day change fetch early nor more than 15 minutes late."""
+    scheduler = FetchScheduler(rng=random.Random(42))
+    now = at(DAY, 12)
+    deadline = at(NEXT_DAY, 6)
+    window = DEFAULT_JITTER[FETCH_REASON_NEXT_DAY]
+    for _ in range(100):
+        plan = scheduler.plan(now, data_end(DAY, 2))
+        assert deadline <= plan.at <= deadline + datetime.timedelta(seconds=window.after)
+
+
+def test_plan_never_in_the_past() -> None:
+    """A deadline already passed is moved one second ahead."""
+    now = at(DAY, 12)
+    plan = FetchScheduler(jitter={}).plan_in(
+        now, datetime.timedelta(seconds=-30), FETCH_REASON_RETRY
+    )
+    assert plan.at == now + datetime.timedelta(seconds=1)
+    assert plan.reason == FETCH_REASON_RETRY
+
+
+def test_plan_notifies_listeners() -> None:
+    """Listeners are called on each new plan until removed."""
+    scheduler = FetchScheduler(jitter={})
+    calls = []
+    remove = scheduler.async_add_listener(lambda: calls.append(scheduler.next_fetch))
+    plan = scheduler.plan(at(DAY, 3), data_end(DAY, 1))
+    assert calls == [plan]
+    remove()
+    scheduler.plan(at(DAY, 4), data_end(DAY, 1))
+    assert calls == [plan]
+
+
+def test_announcement_confirmed() -> None:
+    """A color is published for good on a previous day or after the confirmation time."""
+    now = at(DAY, 10, 50)
+    assert not announcement_confirmed(now, None)
+    assert not announcement_confirmed(now, at(DAY, 10, 39))
+    assert announcement_confirmed(now, at(DAY, 10, 40))
+    assert announcement_confirmed(now, at(PREVIOUS_DAY, 7))
@@ -0,0 +1,82 @@
+"""History backfill: request windows and a full run against the stand-in."""
+from __future__ import annotations
+
+import asyncio
+import datetime
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.rtetempo.const import (
+    API_HISTORY_START,
+    API_MAX_WINDOW_DAYS,
+    DOMAIN,
+    OPTION_HISTORY_BACKFILL,
+)
+from custom_components.rtetempo.history_backfill import backfill_windows
+from custom_components.rtetempo.tempo_days import cycle_bounds
+
+from ha_harness import forge_entry
+from rte_standin import RTEStandIn
+
+
+@pytest.mark.parametrize(
+    "end",
+    [
+        datetime.date(2024, 1, 15),
+        datetime.date(2024, 9, 1),
+        datetime.date(2015, 3, 2),
+    ],
+)
+def test_backfill_windows(end: datetime.date) -> None:
+    """Windows cover the history newest first, one Tempo cycle at most each."""
+    windows = backfill_windows(end)
+    assert windows[0].end == end
+    assert windows[-1].start == API_HISTORY_START
+    for newer, older in zip(windows, windows[1:]):
+        assert older.end == newer.start
+    for window in windows:
+        assert 0 < (window.end - window.start).days <= API_MAX_WINDOW_DAYS
+        assert cycle_bounds(window.start) == cycle_bounds(
+            window.end - datetime.timedelta(days=1)
+        )
+
+
+def test_backfill_windows_custom_start() -> None:
+    """The history start bounds the windows, nothing to fetch once reached."""
+    windows = backfill_windows(datetime.date(2024, 1, 15), datetime.date(2022, 10, 1))
+    assert [window.start for window in windows] == [
+        datetime.date(2023, 9, 1),
+        datetime.date(2022, 10, 1),
+    ]
+    assert backfill_windows(API_HISTORY_START) == []
+    assert backfill_windows(datetime.date(2013, 1, 1)) == []
+
+
+@pytest.mark.parametrize("standin", [RTEStandIn(history_days=1500)])
+async def test_backfill_run(hass: HomeAssistant, standin: RTEStandIn) -> None:
+    """The backfill fetches the whole history served, contiguous, and stops on the first empty window."""
+    entry = forge_entry(standin)
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    worker = hass.data[DOMAIN]["api_worker"]
+    backfill = worker._backfill  # pylint: disable=protected-access
+    backfill._interval = 0  # pylint: disable=protected-access
+    windows = backfill_windows(worker.history_boundary())
+    requests = standin.calls["tempo"]
+    hass.config_entries.async_update_entry(
+        entry, options={OPTION_HISTORY_BACKFILL: True}
+    )
+    await hass.async_block_till_done()
+    async with asyncio.timeout(10):
+        while backfill._task is not None:  # pylint: disable=protected-access
+            await asyncio.sleep(0.05)
+    assert worker.history_boundary() == API_HISTORY_START
+    days = [day for day, _, _ in worker.snapshot.days.days()]
+    oldest = standin.clock().date() - datetime.timedelta(days=standin.history_days)
+    assert days[0] == oldest
+    assert all((newer - older).days == 1 for older, newer in zip(days, days[1:]))
+    # the windows with data and the first empty one, at least
+    served = sum(1 for window in windows if window.end > oldest)
+    assert standin.calls["tempo"] - requests >= served + 1
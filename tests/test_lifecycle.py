@@ -0,0 +1,148 @@
+"""Lifecycle of the API worker shared by the config entries, against the RTE API stand-in."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.rtetempo.const import DOMAIN
+from custom_components.rtetempo.fetch_scheduler import (
+    FETCH_REASON_CIRCUIT_OPEN,
+    FETCH_REASON_RETRY,
+)
+
+from ha_harness import forge_entry
+from rte_standin import RTEStandIn
+
+
+async def setup_entries(hass: HomeAssistant, standin: RTEStandIn, *titles: str):
+    """Add config entries using the stand-in credentials."""
+    entries = [forge_entry(standin, title) for title in titles]
+    for entry in entries:
+        await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    return entries
+
+
+async def test_setup_fetches(hass: HomeAssistant, standin: RTEStandIn) -> None:
+    """The first config entry starts a worker fetching the stand-in days."""
+    await setup_entries(hass, standin, "one")
+    worker = hass.data[DOMAIN]["api_worker"]
+    assert worker.config_entry is None
+    assert worker.last_update_success
+    assert standin.calls["token"] == 1
+    assert standin.calls["tempo"] >= 1
+    assert len(worker.snapshot.days) > 0
+    assert worker.scheduler.next_fetch is not None
+
+
+async def test_unload_keeps_shared_worker(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """Unloading the entry which created the worker leaves it fetching for the other one."""
+    entries = await setup_entries(hass, standin, "one", "two")
+    worker = hass.data[DOMAIN]["api_worker"]
+    await hass.config_entries.async_unload(entries[0].entry_id)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN]["api_worker"] is worker
+    requests = standin.calls["tempo"]
+    await worker.async_refresh()
+    assert standin.calls["tempo"] > requests
+    assert worker.update_interval is not None
+
+
+async def test_reload_reuses_worker(hass: HomeAssistant, standin: RTEStandIn) -> None:
+    """Reloading an entry while another one is loaded reuses the running worker."""
+    entries = await setup_entries(hass, standin, "one", "two")
+    worker = hass.data[DOMAIN]["api_worker"]
+    await hass.config_entries.async_reload(entries[0].entry_id)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN]["api_worker"] is worker
+    requests = standin.calls["tempo"]
+    await worker.async_refresh()
+    assert standin.calls["tempo"] > requests
+
+
+async def test_last_unload_stops_worker(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """The last unload stops the worker and forgets it."""
+    entries = await setup_entries(hass, standin, "one", "two")
+    worker = hass.data[DOMAIN]["api_worker"]
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert "api_worker" not in hass.data[DOMAIN]
+    assert worker._shutdown_requested  # pylint: disable=protected-access
+
+
+async def test_hass_stop_stops_worker(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """Stopping Home Assistant shuts the running worker down."""
+    await setup_entries(hass, standin, "one")
+    worker = hass.data[DOMAIN]["api_worker"]
+    await hass.async_stop()
+    assert worker._shutdown_requested  # pylint: disable=protected-access
+
+
+async def test_invalid_payload_is_retried(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """A successful answer without the expected payload is a failed fetch, retried."""
+    await setup_entries(hass, standin, "one")
+    worker = hass.data[DOMAIN]["api_worker"]
+    generation = worker.snapshot.generation
+    standin.fail_next(200)
+    await worker.async_refresh()
+    assert worker.retry.failures == 1
+    assert worker.scheduler.next_fetch.reason == FETCH_REASON_RETRY
+    assert worker.snapshot.generation == generation
+    await worker.async_refresh()
+    assert worker.retry.failures == 0
+
+
+async def test_expired_token_is_renewed(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """An access token expired before its announced lifetime is renewed once."""
+    await setup_entries(hass, standin, "one")
+    worker = hass.data[DOMAIN]["api_worker"]
+    tokens = standin.calls["token"]
+    standin.expire_tokens()
+    await worker.async_refresh()
+    assert worker.retry.failures == 0
+    assert standin.calls["token"] == tokens + 1
+
+
+async def test_rejected_credentials_open_circuit(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """Rejected credentials open the circuit breaker, accepted ones close it."""
+    await setup_entries(hass, standin, "one")
+    worker = hass.data[DOMAIN]["api_worker"]
+    standin.client_secret = "rotated"
+    worker.tokens.invalidate()
+    await worker.async_refresh()
+    assert worker.retry.circuit_open
+    assert worker.scheduler.next_fetch.reason == FETCH_REASON_CIRCUIT_OPEN
+    standin.client_secret = "client_secret"
+    await worker.async_refresh()
+    assert not worker.retry.circuit_open
+    assert worker.retry.failures == 0
+
+
+async def test_unchanged_days_are_not_modified(
+    hass: HomeAssistant, standin: RTEStandIn
+) -> None:
+    """Refetching unchanged days is answered by a 304 and publishes no new snapshot."""
+    await setup_entries(hass, standin, "one")
+    worker = hass.data[DOMAIN]["api_worker"]
+    # the first narrow fetch after the setup reconciliation learns its validators
+    await worker.async_refresh()
+    generation = worker.snapshot.generation
+    days = standin.calls["tempo_days"]
+    await worker.async_refresh()
+    assert worker.retry.failures == 0
+    assert standin.calls["not_modified"] == 1
+    assert standin.calls["tempo_days"] == days
+    assert worker.snapshot.generation == generation
+    assert worker.snapshot.generation == generation
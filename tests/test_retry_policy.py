@@ -0,0 +1,107 @@
+"""Error classification, backoff and circuit breaker of the API worker."""
+from __future__ import annotations
+
+import asyncio
+import datetime
+
+import aiohttp
+import pytest
+
+from custom_components.rtetempo.api_client import (
+    BadRequest,
+    ServerError,
+    UnexpectedError,
+)
+from custom_components.rtetempo.const import (
+    API_CIRCUIT_MAX_DELAY,
+    API_CIRCUIT_OPEN_DELAY,
+    API_RETRY_AFTER_MAX,
+    API_RETRY_FIRST_DELAY,
+    API_RETRY_MAX_DELAY,
+)
+from custom_components.rtetempo.retry_policy import (
+    ErrorKind,
+    RetryPolicy,
+    classify_error,
+)
+from custom_components.rtetempo.token_manager import OAuthError
+
+
+@pytest.mark.parametrize(
+    ("error", "kind"),
+    [
+        (OAuthError("rejected", 401), ErrorKind.AUTH),
+        (OAuthError("rejected", 400), ErrorKind.AUTH),
+        (OAuthError("unavailable", 503), ErrorKind.TRANSIENT),
+        (OAuthError("network"), ErrorKind.TRANSIENT),
+        (BadRequest(401, "unauthorized"), ErrorKind.AUTH),
+        (BadRequest(403, "forbidden"), ErrorKind.AUTH),
+        (BadRequest(408, "timeout"), ErrorKind.TRANSIENT),
+        (BadRequest(429, "throttled"), ErrorKind.TRANSIENT),
+        (BadRequest(400, "bad range"), ErrorKind.PERMANENT),
+        (BadRequest(404, "not found"), ErrorKind.PERMANENT),
+        (ServerError(500, "error"), ErrorKind.TRANSIENT),
+        (UnexpectedError(200, "invalid payload"), ErrorKind.TRANSIENT),
+        (aiohttp.ClientConnectionError(), ErrorKind.TRANSIENT),
+        (asyncio.TimeoutError(), ErrorKind.TRANSIENT),
+        (None, ErrorKind.TRANSIENT),
+    ],
+)
+def test_classify_error(error, kind) -> None:
+    """Each failure gets its retry class."""
+    assert classify_error(error) is kind
+
+
+def test_transient_backoff() -> None:
+    """Transient errors are retried within an exponential bound, capped."""
+    policy = RetryPolicy()
+    for failures in range(1, 20):
+        delay = policy.record_failure(ServerError(500, "error"))
+        bound = min(API_RETRY_FIRST_DELAY * 2 ** (failures - 1), API_RETRY_MAX_DELAY)
+        assert datetime.timedelta(seconds=1) <= delay
+        assert delay <= datetime.timedelta(seconds=bound)
+    assert policy.failures == 19
+    assert not policy.circuit_open
+
+
+def test_retry_after_is_honoured() -> None:
+    """A Retry-After asked by the API is honoured up to a maximum."""
+    policy = RetryPolicy()
+    delay = policy.record_failure(BadRequest(429, "throttled", retry_after=120))
+    assert delay == datetime.timedelta(seconds=120)
+    delay = policy.record_failure(ServerError(503, "busy", retry_after=10**6))
+    assert delay == datetime.timedelta(seconds=API_RETRY_AFTER_MAX)
+
+
+def test_permanent_error_waits_longest_retry() -> None:
+    """A request rejected as is waits the longest retry delay."""
+    delay = RetryPolicy().record_failure(BadRequest(400, "bad range"))
+    assert delay == datetime.timedelta(seconds=API_RETRY_MAX_DELAY)
+
+
+def test_circuit_breaker() -> None:
+    """Rejected credentials open the circuit, each new rejection doubles the pause up to a maximum."""
+    policy = RetryPolicy()
+    delays = [
+        policy.record_failure(OAuthError("rejected", 401)).total_seconds()
+        for _ in range(8)
+    ]
+    assert policy.circuit_open
+    assert delays[:3] == [
+        API_CIRCUIT_OPEN_DELAY,
+        2 * API_CIRCUIT_OPEN_DELAY,
+        4 * API_CIRCUIT_OPEN_DELAY,
+    ]
+    assert delays[-1] == API_CIRCUIT_MAX_DELAY
+
+
+def test_reset() -> None:
+    """A successful fetch closes the circuit and forgets the failures."""
+    policy = RetryPolicy()
+    policy.record_failure(ServerError(500, "error"))
+    policy.record_failure(BadRequest(401, "unauthorized"))
+    policy.reset()
+    assert policy.failures == 0
+    assert not policy.circuit_open
+    delay = policy.record_failure(ServerError(500, "error"))
+    assert delay <= datetime.timedelta(seconds=API_RETRY_FIRST_DELAY)
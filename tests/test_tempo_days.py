@@ -0,0 +1,131 @@
+"""Tempo days store: merge, diff and the cycle counts."""
+from __future__ import annotations
+
+import datetime
+
+from custom_components.rtetempo.const import (
+    API_VALUE_BLUE,
+    API_VALUE_RED,
+    API_VALUE_WHITE,
+    FRANCE_TZ,
+)
+from custom_components.rtetempo.tempo_days import (
+    TempoDaysStore,
+    cycle_bounds,
+    tempo_date,
+)
+
+DAY = datetime.date(2024, 1, 15)
+UPDATED = datetime.datetime(2024, 1, 14, 10, 30, tzinfo=FRANCE_TZ)
+
+
+def day(offset: int) -> datetime.date:
+    """Return a day relative to the reference one."""
+    return DAY + datetime.timedelta(days=offset)
+
+
+def forge_store(*values: str) -> TempoDaysStore:
+    """Forge a store with consecutive days starting at the reference one."""
+    store = TempoDaysStore()
+    store.merge((day(offset), value, UPDATED) for offset, value in enumerate(values))
+    return store
+
+
+def test_merge_reports_added_and_changed() -> None:
+    """Merging reports the new days and the days with a new value or publication time."""
+    store = forge_store(API_VALUE_BLUE, API_VALUE_WHITE)
+    assert len(store) == 2
+    later = UPDATED + datetime.timedelta(hours=1)
+    changes = store.merge(
+        [
+            (day(0), API_VALUE_BLUE, UPDATED),  # unchanged
+            (day(1), API_VALUE_WHITE, later),  # republished
+            (day(2), API_VALUE_RED, UPDATED),  # new
+            (day(-2), API_VALUE_RED, UPDATED),  # new, before a gap
+        ]
+    )
+    assert changes.Added == [day(2), day(-2)]
+    assert changes.Changed == [day(1)]
+    assert changes.Removed == []
+    assert len(store) == 4
+    assert store.oldest_day() == day(-2)
+    assert store.newest_day() == day(2)
+    assert store.color_for_date(day(-1)) is None
+    assert store.next_known_day(day(-2)) == day(0)
+
+
+def test_merge_unchanged_is_empty() -> None:
+    """Merging the same days again changes nothing."""
+    store = forge_store(API_VALUE_BLUE, API_VALUE_RED)
+    assert store.merge(list(forge_store(API_VALUE_BLUE, API_VALUE_RED).days())).empty()
+
+
+def test_diff() -> None:
+    """The diff between two stores reports the added, changed and removed days."""
+    previous = forge_store(API_VALUE_BLUE, API_VALUE_WHITE, API_VALUE_RED)
+    current = previous.copy()
+    current.remove_before(day(1))
+    current.set_day(day(2), API_VALUE_BLUE, UPDATED)
+    current.set_day(day(5), API_VALUE_WHITE, UPDATED)
+    changes = current.diff(previous)
+    assert changes.Added == [day(5)]
+    assert changes.Changed == [day(2)]
+    assert changes.Removed == [day(0)]
+    assert previous.color_for_date(day(2)) == API_VALUE_RED
+    assert current.diff(current).empty()
+    assert TempoDaysStore().diff(TempoDaysStore()).empty()
+
+
+def test_copy_before() -> None:
+    """A partial copy only keeps the days older than a given one."""
+    store = forge_store(API_VALUE_BLUE, API_VALUE_WHITE, API_VALUE_RED)
+    clone = store.copy(before=day(2))
+    assert len(clone) == 2
+    assert clone.newest_day() == day(1)
+    assert len(store.copy(before=day(-10))) == 0
+    assert len(store) == 3
+
+
+def test_remove_before() -> None:
+    """Removing the old days returns them."""
+    store = forge_store(API_VALUE_BLUE, API_VALUE_WHITE, API_VALUE_RED)
+    assert store.remove_before(day(0)) == []
+    assert store.remove_before(day(2)) == [day(0), day(1)]
+    assert len(store) == 1
+    assert store.oldest_day() == day(2)
+    assert store.remove_before(day(10)) == [day(2)]
+    assert len(store) == 0
+
+
+def test_unknown_value_is_kept() -> None:
+    """A value unknown to the integration is stored as is and not counted."""
+    store = forge_store(API_VALUE_BLUE, "PURPLE")
+    assert store.color_for_date(day(1)) == "PURPLE"
+    assert store.count_colors(day(0), day(1)) == (1, 0, 0)
+
+
+def test_count_colors_and_cycle_summary() -> None:
+    """Colors are counted over a range and over the cycle of a day."""
+    store = forge_store(
+        API_VALUE_BLUE, API_VALUE_RED, API_VALUE_WHITE, API_VALUE_RED, API_VALUE_BLUE
+    )
+    assert store.count_colors(day(0), day(4)) == (2, 1, 2)
+    assert store.count_colors(day(1), day(2)) == (0, 1, 1)
+    assert store.count_colors(day(10), day(20)) == (0, 0, 0)
+    store.set_day(day(0), API_VALUE_RED, UPDATED)
+    summary = store.cycle_summary(DAY)
+    assert (summary.Start, summary.End) == cycle_bounds(DAY)
+    assert summary.TotalDays == 366
+    assert (summary.Blue, summary.White, summary.Red) == (1, 1, 3)
+
+
+def test_cycle_bounds_and_tempo_date() -> None:
+    """Cycles start on September 1st and tempo days at 6h."""
+    assert cycle_bounds(datetime.date(2024, 8, 31)) == (
+        datetime.date(2023, 9, 1),
+        datetime.date(2024, 9, 1),
+    )
+    assert cycle_bounds(datetime.date(2024, 9, 1))[0] == datetime.date(2024, 9, 1)
+    morning = datetime.datetime(2024, 1, 15, 5, 59, tzinfo=FRANCE_TZ)
+    assert tempo_date(morning) == datetime.date(2024, 1, 14)
+    assert tempo_date(morning + datetime.timedelta(minutes=1)) == DAY
@@ -0,0 +1,270 @@
+"""Benchmark suite of the RTE Tempo Calendar integration hot paths.
+
+Runs the API worker against the local RTE API stand-in (no network needed)
+and times:
+- a full fetch (HTTP round trip, parsing and merge) and the parsing alone
+- the next fetch planning (FetchScheduler.plan)
+- the calendar events lookup over several range sizes
+- the entry tick context computation and the entities apply_tick() methods
+- the error paths (401, 429, 500, 503 and token expiry)
+
+Usage (from the repository root, with Home Assistant installed):
+    python tools/bench_integration.py [--repeat 20] [--latency 0]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import time
+import timeit
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.storage import Store  # noqa: E402
+
+from custom_components.rtetempo import (  # noqa: E402
+    api_client as api_client_module,
+    token_manager as token_manager_module,
+)
+from custom_components.rtetempo.api_worker import (  # noqa: E402
+    APIWorker,
+    parse_rte_api_date,
+    parse_rte_api_datetime,
+    parse_rte_api_days,
+)
+from custom_components.rtetempo.binary_sensor import OffPeakHours  # noqa: E402
+from custom_components.rtetempo.calendar import TempoCalendar  # noqa: E402
+from custom_components.rtetempo.const import (  # noqa: E402
+    API_HISTORY_DAYS,
+    API_VALUE_BLUE,
+    API_VALUE_RED,
+    API_VALUE_WHITE,
+    DOMAIN,
+    FRANCE_TZ,
+    OPTION_ADJUSTED_DAYS,
+)
+from custom_components.rtetempo.entry_updater import (  # noqa: E402
+    EntryUpdater,
+    forge_tick,
+)
+from custom_components.rtetempo.sensor import (  # noqa: E402
+    CurrentColor,
+    DaysLeft,
+    DaysUsed,
+    NextColor,
+    NextColorTime,
+    NextCycleTime,
+    OffPeakChangeTime,
+)
+from custom_components.rtetempo.transitions import TransitionScheduler  # noqa: E402
+
+from rte_standin import RTEStandIn  # noqa: E402
+
+CALENDAR_RANGES = (1, 7, 31, 365)
+
+
+def report(name: str, durations: list[float], number: int = 1) -> None:
+    """Print the best duration of a benchmark."""
+    print(f"{name:<48}{min(durations) / number * 1e6:>12.1f} µs")
+
+
+async def async_repeat(func: Callable[[], Awaitable], repeat: int) -> list[float]:
+    """Time an awaitable factory several times."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def bench_fetch(worker: APIWorker, standin: RTEStandIn, repeat: int) -> None:
+    """Benchmark a full reconciliation and the payload parsing."""
+    now = datetime.datetime.now(FRANCE_TZ)
+
+    def clear_caches() -> None:
+        parse_rte_api_date.cache_clear()
+        parse_rte_api_datetime.cache_clear()
+
+    async def full_fetch():
+        clear_caches()
+        await worker._async_update_tempo_days(  # pylint: disable=protected-access
+            now, API_HISTORY_DAYS, 2, True
+        )
+
+    report(
+        "full fetch (round trip + parse + merge)",
+        await async_repeat(full_fetch, repeat),
+    )
+    values = standin.tempo_values(
+        now.date() - datetime.timedelta(days=API_HISTORY_DAYS),
+        now.date() + datetime.timedelta(days=2),
+    )
+    assert len(worker.tempo_days) == len(values)
+
+    def cold_parse():
+        clear_caches()
+        parse_rte_api_days(values)
+
+    report(
+        f"parse {len(values)} days, cold",
+        timeit.repeat(cold_parse, number=1, repeat=repeat),
+    )
+    report(
+        f"parse {len(values)} days, warm",
+        timeit.repeat(lambda: parse_rte_api_days(values), number=1, repeat=repeat),
+    )
+
+
+def bench_wait_time(worker: APIWorker, repeat: int) -> None:
+    """Benchmark the next fetch planning over a day of wall clock times."""
+    today = datetime.datetime.combine(
+        datetime.date.today(), datetime.time(tzinfo=FRANCE_TZ)
+    )
+    instants = [
+        today + datetime.timedelta(minutes=minutes) for minutes in range(0, 1440, 10)
+    ]
+    ends = (
+        today + datetime.timedelta(days=1),
+        today + datetime.timedelta(days=2),
+    )
+
+    def plan():
+        for instant in instants:
+            for end in ends:
+                worker.scheduler.plan(instant, end)
+
+    number = len(instants) * len(ends)
+    report("FetchScheduler.plan", timeit.repeat(plan, number=1, repeat=repeat), number)
+
+
+async def bench_calendar(
+    worker: APIWorker, updater: EntryUpdater, repeat: int
+) -> None:
+    """Benchmark the calendar events lookup over several range sizes."""
+    now = datetime.datetime.now(FRANCE_TZ)
+    for adjusted in (False, True):
+        config_entry = ConfigEntry(
+            version=1,
+            domain=DOMAIN,
+            title="bench",
+            data={},
+            source=SOURCE_USER,
+            options={OPTION_ADJUSTED_DAYS: adjusted},
+        )
+        worker.set_adjusted_days(config_entry.entry_id, adjusted)
+        calendar = TempoCalendar(worker, updater, config_entry)
+        for nb_days in CALENDAR_RANGES:
+            start = now - datetime.timedelta(days=nb_days - 1)
+            durations = await async_repeat(
+                lambda start=start: calendar.async_get_events(worker.hass, start, now),
+                repeat,
+            )
+            mode = "adjusted" if adjusted else "all day"
+            report(f"calendar {nb_days} day(s) range, {mode}", durations)
+
+
+def bench_entities(worker: APIWorker, updater: EntryUpdater, repeat: int) -> None:
+    """Benchmark the tick context computation and the entities apply_tick() methods."""
+    now = datetime.datetime.now(FRANCE_TZ)
+    snapshot = worker.snapshot
+    report(
+        "forge_tick()",
+        timeit.repeat(
+            lambda: forge_tick(now, snapshot, "bench"), number=100, repeat=repeat
+        ),
+        100,
+    )
+    tick = forge_tick(now, snapshot, "bench")
+    entities = [
+        CurrentColor("bench", updater, False),
+        NextColor("bench", updater, False),
+        NextColorTime("bench", updater),
+        DaysLeft("bench", updater, API_VALUE_BLUE),
+        DaysLeft("bench", updater, API_VALUE_WHITE),
+        DaysUsed("bench", updater, API_VALUE_RED),
+        NextCycleTime("bench", updater),
+        OffPeakChangeTime("bench", updater),
+        OffPeakHours("bench", updater),
+    ]
+    for entity in entities:
+        report(
+            f"{entity.name}: apply_tick()",
+            timeit.repeat(
+                lambda entity=entity: entity.apply_tick(tick),
+                number=100,
+                repeat=repeat,
+            ),
+            100,
+        )
+
+
+async def bench_errors(worker: APIWorker, standin: RTEStandIn, repeat: int) -> None:
+    """Benchmark the error paths: each refresh must fail cleanly."""
+    now = datetime.datetime.now(FRANCE_TZ)
+    logging.disable(logging.CRITICAL)
+    try:
+        for status, retry_after in ((401, None), (429, 30), (500, None), (503, 60)):
+
+            async def failing_fetch(status=status, retry_after=retry_after):
+                standin.fail_next(status, retry_after)
+                # pylint: disable-next=protected-access
+                await worker._async_update_tempo_days(now, 1, 2, False)
+
+            report(f"HTTP {status} refresh", await async_repeat(failing_fetch, repeat))
+
+        async def expired_fetch():
+            standin.expire_tokens()
+            await worker._async_update_tempo_days(  # pylint: disable=protected-access
+                now, 1, 2, False
+            )
+
+        report("expired token refresh", await async_repeat(expired_fetch, repeat))
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the benchmark suite."""
+    hass = HomeAssistant(tempfile.mkdtemp())
+    hass.config.set_time_zone("Europe/Paris")
+    await hass.async_start()
+    standin = RTEStandIn(latency=args.latency)
+    await standin.start()
+    try:
+        with patch.object(
+            token_manager_module, "API_TOKEN_ENDPOINT", standin.token_url
+        ), patch.object(api_client_module, "API_TEMPO_ENDPOINT", standin.tempo_url):
+            worker = APIWorker(hass, Store(hass, 1, "rtetempo.bench"))
+            worker.add_credentials("bench", standin.client_id, standin.client_secret)
+            updater = EntryUpdater(worker, TransitionScheduler(hass), "bench")
+            print(f"Best of {args.repeat} runs")
+            await bench_fetch(worker, standin, args.repeat)
+            bench_wait_time(worker, args.repeat)
+            await bench_calendar(worker, updater, args.repeat)
+            bench_entities(worker, updater, args.repeat)
+            await bench_errors(worker, standin, args.repeat)
+            print(
+                f"Stand-in served {standin.calls['token']} token and"
+                f" {standin.calls['tempo']} tempo requests, {standin.bytes_sent} bytes"
+            )
+    finally:
+        await standin.stop()
+        await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    asyncio.run(async_main(parser.parse_args()))
@@ -0,0 +1,151 @@
+"""Micro-benchmark of the RTE Tempo API payload parsing.
+
+Compares the strptime based parsing used up to v1.3.2 (two TempoDay lists,
+five strptime calls per day) with the current batch parser, on a generated
+multi-season payload. The current parser is measured cold (first poll) and
+warm (following polls returning mostly the same timestamps).
+
+Usage (from the repository root, with Home Assistant installed):
+    python tools/bench_parsing.py [--seasons 5] [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from custom_components.rtetempo.api_worker import (  # noqa: E402
+    parse_rte_api_date,
+    parse_rte_api_datetime,
+    parse_rte_api_days,
+)
+from custom_components.rtetempo.const import (  # noqa: E402
+    API_DATE_FORMAT,
+    API_KEY_END,
+    API_KEY_START,
+    API_KEY_UPDATED,
+    API_KEY_VALUE,
+    API_VALUE_BLUE,
+    API_VALUE_RED,
+    API_VALUE_WHITE,
+    FRANCE_TZ,
+    HOUR_OF_CHANGE,
+)
+
+
+def forge_values(seasons: int) -> list[dict[str, str]]:
+    """Forge the values of an API payload covering several seasons, newest first."""
+    today = datetime.date.today()
+    values = []
+    for offset in range(seasons * 365):
+        day = today - datetime.timedelta(days=offset)
+        start = datetime.datetime.combine(day, datetime.time(tzinfo=FRANCE_TZ))
+        end = datetime.datetime.combine(
+            day + datetime.timedelta(days=1), datetime.time(tzinfo=FRANCE_TZ)
+        )
+        updated = start - datetime.timedelta(hours=13, minutes=offset % 60)
+        values.append(
+            {
+                API_KEY_START: start.isoformat(),
+                API_KEY_END: end.isoformat(),
+                API_KEY_VALUE: (API_VALUE_BLUE, API_VALUE_WHITE, API_VALUE_RED)[
+                    offset % 3
+                ],
+                API_KEY_UPDATED: updated.isoformat(),
+            }
+        )
+    return values
+
+
+def legacy_parse_datetime(date: str) -> datetime.datetime:
+    """Parse a RTE datetime as v1.3.2 did."""
+    date = date[:-3] + date[-2:]
+    return datetime.datetime.strptime(date, API_DATE_FORMAT)
+
+
+def legacy_parse_date(date: str) -> datetime.date:
+    """Parse a RTE date as v1.3.2 did."""
+    day_datetime = legacy_parse_datetime(date)
+    return datetime.date(
+        year=day_datetime.year, month=day_datetime.month, day=day_datetime.day
+    )
+
+
+def legacy_parse(values: list[dict[str, str]]) -> tuple[list, list]:
+    """Build both day lists as v1.3.2 did."""
+    change = datetime.timedelta(hours=HOUR_OF_CHANGE)
+    days_time = []
+    days_date = []
+    for tempo_day in values:
+        days_time.append(
+            (
+                legacy_parse_datetime(tempo_day[API_KEY_START]) + change,
+                legacy_parse_datetime(tempo_day[API_KEY_END]) + change,
+                tempo_day[API_KEY_VALUE],
+                legacy_parse_datetime(tempo_day[API_KEY_UPDATED]),
+            )
+        )
+        days_date.append(
+            (
+                legacy_parse_date(tempo_day[API_KEY_START]),
+                legacy_parse_date(tempo_day[API_KEY_END]),
+                tempo_day[API_KEY_VALUE],
+                legacy_parse_datetime(tempo_day[API_KEY_UPDATED]),
+            )
+        )
+    return days_time, days_date
+
+
+def clear_caches() -> None:
+    """Forget the memoized timestamps."""
+    parse_rte_api_date.cache_clear()
+    parse_rte_api_datetime.cache_clear()
+
+
+def cold_parse(values: list[dict[str, str]]) -> None:
+    """Parse a payload as the first poll would."""
+    clear_caches()
+    parse_rte_api_days(values)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    values = forge_values(args.seasons)
+    # sanity check: both parsers agree on the days
+    legacy_days = legacy_parse(values)[1]
+    clear_caches()
+    assert [(day[0], day[2], day[3]) for day in legacy_days] == parse_rte_api_days(
+        values
+    )
+    print(f"{len(values)} days ({args.seasons} seasons), best of {args.repeat} runs")
+    results = {
+        "legacy strptime (v1.3.2)": min(
+            timeit.repeat(lambda: legacy_parse(values), number=1, repeat=args.repeat)
+        ),
+        "batch parser, cold": min(
+            timeit.repeat(lambda: cold_parse(values), number=1, repeat=args.repeat)
+        ),
+        "batch parser, warm": min(
+            timeit.repeat(
+                lambda: parse_rte_api_days(values), number=1, repeat=args.repeat
+            )
+        ),
+    }
+    reference = results["legacy strptime (v1.3.2)"]
+    for name, duration in results.items():
+        print(
+            f"{name:<28}{duration * 1000:>9.2f} ms{reference / duration:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Minimal Home Assistant instance running the integration against the RTE API stand-in.
+
+Shared by the profiling and simulation scripts of this folder and by the test
+fixtures: it boots a bare Home Assistant core (registries and config entries,
+no frontend nor HTTP server) with the repository custom_components folder, and
+points the integration API endpoints at a local RTEStandIn.
+"""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+import contextlib
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from homeassistant import config_entries, loader  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry,
+    device_registry,
+    entity,
+    entity_registry,
+    issue_registry,
+)
+
+from rte_standin import RTEStandIn  # noqa: E402
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def forge_entry(
+    standin: RTEStandIn, title: str = "rtetempo", options: dict | None = None
+) -> config_entries.ConfigEntry:
+    """Forge a config entry using the stand-in credentials."""
+    return config_entries.ConfigEntry(
+        version=1,
+        domain="rtetempo",
+        title=title,
+        data={"client_id": standin.client_id, "client_secret": standin.client_secret},
+        source=config_entries.SOURCE_USER,
+        options=options or {},
+    )
+
+
+@contextlib.asynccontextmanager
+async def async_hass_with_standin(
+    standin: RTEStandIn,
+) -> AsyncIterator[HomeAssistant]:
+    """Run a bare Home Assistant instance using the stand-in as RTE API."""
+    config_dir = tempfile.mkdtemp()
+    os.symlink(
+        os.path.join(REPO_ROOT, "custom_components"),
+        os.path.join(config_dir, "custom_components"),
+    )
+    hass = HomeAssistant(config_dir)
+    hass.config.set_time_zone("Europe/Paris")
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    # the calendar platform depends on http: pretend it is loaded
+    hass.config.components.add("http")
+    hass.http = SimpleNamespace(register_view=lambda view: None)
+    entity.async_setup(hass)
+    await area_registry.async_load(hass)
+    await device_registry.async_load(hass)
+    await entity_registry.async_load(hass)
+    await issue_registry.async_load(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await hass.async_start()
+    await standin.start()
+    # pylint: disable-next=import-outside-toplevel
+    from custom_components.rtetempo import api_client, token_manager
+
+    try:
+        with patch.object(
+            token_manager, "API_TOKEN_ENDPOINT", standin.token_url
+        ), patch.object(api_client, "API_TEMPO_ENDPOINT", standin.tempo_url):
+            yield hass
+    finally:
+        await hass.async_stop(force=True)
+        await standin.stop()
+
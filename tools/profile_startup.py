@@ -0,0 +1,133 @@
+"""Startup profiling of the RTE Tempo Calendar integration.
+
+Measures, against the local RTE API stand-in:
+- the import cost of each module of the integration, on top of the Home
+  Assistant core modules any instance has already loaded (each module is
+  imported in a fresh interpreter)
+- the async_setup_entry wall time (platforms included)
+- the time to the first valid state of every entity
+
+Both a cold start (empty local cache) and a warm start (reload with the local
+cache written by the cold start) are profiled.
+
+Usage (from the repository root, with Home Assistant installed):
+    python tools/profile_startup.py [--latency 0.2]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import Event, HomeAssistant, callback
+
+from ha_harness import REPO_ROOT, async_hass_with_standin, forge_entry
+from rte_standin import RTEStandIn
+
+MODULES = (
+    "",  # the package itself
+    "config_flow",
+    "const",
+    "api_client",
+    "token_manager",
+    "tempo_days",
+    "transitions",
+    "entry_updater",
+    "history_backfill",
+    "api_worker",
+    "sensor",
+    "binary_sensor",
+    "calendar",
+)
+
+# what a running Home Assistant instance has loaded before any integration
+IMPORT_PROBE = """
+import sys, time
+import homeassistant.core, homeassistant.config_entries
+import homeassistant.helpers.entity, homeassistant.helpers.entity_platform
+import homeassistant.helpers.aiohttp_client, homeassistant.helpers.event
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+loaded = {{name.split(".")[0] for name in set(sys.modules) - before}}
+loaded.discard("custom_components")
+print(duration, " ".join(sorted(loaded)))
+"""
+
+
+def profile_imports() -> None:
+    """Print the import cost of each module in a fresh interpreter."""
+    print("Import cost (on top of the Home Assistant core modules)")
+    for module in MODULES:
+        name = "custom_components.rtetempo" + (f".{module}" if module else "")
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(module=name)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split(maxsplit=1)
+        packages = output[1].strip() if len(output) > 1 else ""
+        print(f"  {name:<40}{float(output[0]) * 1000:>8.1f} ms  {packages}")
+
+
+async def async_profile_setup(
+    hass: HomeAssistant, standin: RTEStandIn, reload_entry_id: str | None = None
+) -> str:
+    """Set up (or reload) a config entry and print its timings."""
+    first_valid: dict[str, float] = {}
+
+    @callback
+    def state_listener(event: Event) -> None:
+        new_state = event.data["new_state"]
+        if (
+            new_state is not None
+            and new_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE)
+            and new_state.entity_id not in first_valid
+        ):
+            first_valid[new_state.entity_id] = time.perf_counter()
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, state_listener)
+    requests_before = sum(standin.calls.values()) - standin.calls["tempo_days"]
+    start = time.perf_counter()
+    if reload_entry_id is None:
+        entry = forge_entry(standin)
+        await hass.config_entries.async_add(entry)
+        entry_id = entry.entry_id
+    else:
+        await hass.config_entries.async_reload(reload_entry_id)
+        entry_id = reload_entry_id
+    setup_time = time.perf_counter() - start
+    # let the background first refresh complete
+    await asyncio.sleep(3 * standin.latency + 0.5)
+    await hass.async_block_till_done()
+    unsub()
+    requests = sum(standin.calls.values()) - standin.calls["tempo_days"] - requests_before
+    print(f"  async_setup_entry {setup_time * 1000:.1f} ms, {requests} API request(s)")
+    for entity_id in sorted(hass.states.async_entity_ids()):
+        if entity_id in first_valid:
+            print(f"    {entity_id:<58}{(first_valid[entity_id] - start) * 1000:>9.1f} ms")
+        else:
+            print(f"    {entity_id:<58}{'never':>12}")
+    return entry_id
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the profiling."""
+    profile_imports()
+    standin = RTEStandIn(latency=args.latency)
+    async with async_hass_with_standin(standin) as hass:
+        print(f"Cold start (empty cache, {args.latency} s API latency)")
+        entry_id = await async_profile_setup(hass, standin)
+        print(f"Warm start (reload with the local cache, {args.latency} s API latency)")
+        await async_profile_setup(hass, standin, entry_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.0)
+    asyncio.run(async_main(parser.parse_args()))
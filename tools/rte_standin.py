@@ -0,0 +1,309 @@
+"""In-process stand-in of the RTE OAuth token and Tempo calendar endpoints.
+
+Used by the benchmarks and simulations of this folder to exercise the
+integration on a plain box without network access. It can be configured for
+history size, latency, token lifetime, HTTP validators (ETag and
+Last-Modified, with conditional requests answered by a 304) and scripted HTTP
+failures (401/429/500/503...).
+
+Usage as a standalone server:
+    python tools/rte_standin.py [--port 8080] [--latency 0.2]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+from collections import Counter, deque
+from collections.abc import Callable
+import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import json
+import secrets
+
+from aiohttp import web
+
+TOKEN_PATH = "/token/oauth"
+TEMPO_PATH = "/open_api/tempo_like_supply_contract/v1/tempo_like_calendars"
+COLORS = ("BLUE", "BLUE", "WHITE", "BLUE", "RED", "BLUE", "WHITE")
+
+
+def paris_tz():
+    """Return the Europe/Paris timezone."""
+    # pylint: disable=import-outside-toplevel
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo("Europe/Paris")
+
+
+def default_color(day: datetime.date) -> str:
+    """Return a deterministic color for a day."""
+    return COLORS[day.toordinal() % len(COLORS)]
+
+
+def default_publication(day: datetime.date) -> datetime.datetime:
+    """Return when RTE publishes the color of a day: 10:30 the day before."""
+    return datetime.datetime.combine(
+        day - datetime.timedelta(days=1),
+        datetime.time(hour=10, minute=30),
+        tzinfo=paris_tz(),
+    )
+
+
+class RTEStandIn:
+    """Fake RTE API serving generated Tempo days."""
+
+    def __init__(
+        self,
+        client_id: str = "client_id",
+        client_secret: str = "client_secret",
+        token_ttl: int = 7200,
+        latency: float = 0.0,
+        history_days: int = 366,
+        clock: Callable[[], datetime.datetime] | None = None,
+        color: Callable[[datetime.date], str] = default_color,
+        publication: Callable[[datetime.date], datetime.datetime] = default_publication,
+        validators: bool = True,
+    ) -> None:
+        """Initialize the stand-in (validators: send ETag/Last-Modified and honour conditional requests)."""
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_ttl = token_ttl
+        self.latency = latency
+        self.history_days = history_days
+        self.clock = clock or (lambda: datetime.datetime.now(paris_tz()))
+        self.color = color
+        self.publication = publication
+        self.validators = validators
+        # scripted failures, consumed one per tempo calendar request
+        self.failures: deque[tuple[int, dict[str, str]]] = deque()
+        # statistics
+        self.calls: Counter[str] = Counter()
+        self.bytes_sent = 0
+        # internals
+        self._tokens: dict[str, datetime.datetime] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    @property
+    def token_url(self) -> str:
+        """Return the token endpoint URL."""
+        return self.base_url + TOKEN_PATH
+
+    @property
+    def tempo_url(self) -> str:
+        """Return the tempo calendar endpoint URL."""
+        return self.base_url + TEMPO_PATH
+
+    def fail_next(self, status: int, retry_after: int | None = None) -> None:
+        """Make the next tempo calendar request fail with the given HTTP status."""
+        headers = {}
+        if retry_after is not None:
+            headers["Retry-After"] = str(retry_after)
+        self.failures.append((status, headers))
+
+    def expire_tokens(self) -> None:
+        """Expire all the issued tokens."""
+        for token in self._tokens:
+            self._tokens[token] = self.clock() - datetime.timedelta(seconds=1)
+
+    def app(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application()
+        app.router.add_post(TOKEN_PATH, self._handle_token)
+        app.router.add_get(TEMPO_PATH, self._handle_tempo)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets  # pylint: disable=protected-access
+        self.base_url = f"http://{host}:{sockets[0].getsockname()[1]}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def tempo_values(
+        self, start: datetime.date, end: datetime.date
+    ) -> list[dict[str, str]]:
+        """Return the days published between start (included) and end (excluded)."""
+        now = self.clock()
+        oldest = now.date() - datetime.timedelta(days=self.history_days)
+        values = []
+        day = end - datetime.timedelta(days=1)
+        while day >= max(start, oldest):
+            published = self.publication(day)
+            if published <= now:
+                values.append(
+                    {
+                        "start_date": _format(day),
+                        "end_date": _format(day + datetime.timedelta(days=1)),
+                        "value": self.color(day),
+                        "updated_date": published.isoformat(timespec="seconds"),
+                    }
+                )
+            day -= datetime.timedelta(days=1)
+        return values
+
+    async def _delay(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _respond(self, status: int, payload: dict, headers=None) -> web.Response:
+        body = json.dumps(payload).encode()
+        self.bytes_sent += len(body)
+        return web.Response(
+            status=status,
+            body=body,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def _handle_token(self, request: web.Request) -> web.Response:
+        self.calls["token"] += 1
+        await self._delay()
+        expected = base64.b64encode(
+            f"{self.client_id}:{self.client_secret}".encode()
+        ).decode()
+        if request.headers.get("Authorization") != f"Basic {expected}":
+            return self._respond(
+                401,
+                {"error": "invalid_client", "error_description": "Bad credentials"},
+            )
+        token = secrets.token_hex(16)
+        expires = self.clock() + datetime.timedelta(seconds=self.token_ttl)
+        self._tokens[token] = expires
+        return self._respond(
+            200,
+            {
+                "access_token": token,
+                "token_type": "Bearer",
+                "expires_in": self.token_ttl,
+            },
+        )
+
+    async def _handle_tempo(self, request: web.Request) -> web.Response:
+        self.calls["tempo"] += 1
+        await self._delay()
+        # authentication
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if self._tokens.get(token, self.clock()) <= self.clock():
+            return self._respond(401, {"error": "invalid_token"})
+        # scripted failures
+        if self.failures:
+            status, headers = self.failures.popleft()
+            if status in (400, 500):
+                payload = {"error": "ERR", "error_description": "Scripted failure"}
+            else:
+                payload = {}
+            return self._respond(status, payload, headers)
+        # data
+        today = self.clock().date()
+        try:
+            start = datetime.date.fromisoformat(request.query["start_date"][:10])
+            end = datetime.date.fromisoformat(request.query["end_date"][:10])
+        except KeyError:
+            # default window: today and tomorrow
+            start = today
+            end = today + datetime.timedelta(days=2)
+        except ValueError:
+            return self._respond(
+                400, {"error": "TMPLIKSUPCON_TMPLIKCAL_F04", "error_description": "?"}
+            )
+        if (end - start).days > 366:
+            return self._respond(
+                400,
+                {
+                    "error": "TMPLIKSUPCON_TMPLIKCAL_F05",
+                    "error_description": "The period must be less than 366 days",
+                },
+            )
+        values = self.tempo_values(start, end)
+        payload = {
+            "tempo_like_calendars": {
+                "start_date": _format(start),
+                "end_date": _format(end),
+                "values": values,
+            }
+        }
+        if not self.validators:
+            self.calls["tempo_days"] += (end - start).days
+            return self._respond(200, payload)
+        # validators: ETag of the payload, Last-Modified as the newest publication
+        etag = '"' + hashlib.blake2b(
+            json.dumps(payload).encode(), digest_size=8
+        ).hexdigest() + '"'
+        headers = {"ETag": etag}
+        last_modified = max(
+            (datetime.datetime.fromisoformat(value["updated_date"]) for value in values),
+            default=None,
+        )
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(
+                last_modified.astimezone(datetime.timezone.utc), usegmt=True
+            )
+        if _not_modified(request, etag, last_modified):
+            self.calls["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+        self.calls["tempo_days"] += (end - start).days
+        return self._respond(200, payload, headers)
+
+
+def _not_modified(
+    request: web.Request, etag: str, last_modified: datetime.datetime | None
+) -> bool:
+    """Evaluate the conditional headers of a request (If-None-Match takes precedence)."""
+    if "If-None-Match" in request.headers:
+        return request.headers["If-None-Match"] == etag
+    if "If-Modified-Since" in request.headers and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(request.headers["If-Modified-Since"])
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _format(day: datetime.date) -> str:
+    midnight = datetime.datetime.combine(day, datetime.time(), tzinfo=paris_tz())
+    return midnight.isoformat()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    standin = RTEStandIn(
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        token_ttl=args.token_ttl,
+        latency=args.latency,
+        validators=not args.no_validators,
+    )
+    url = await standin.start(port=args.port)
+    print(f"Token endpoint: {standin.token_url}")
+    print(f"Tempo endpoint: {standin.tempo_url}")
+    print(f"Serving on {url}, hit Ctrl+C to stop")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=int, default=7200)
+    parser.add_argument("--client-id", default="client_id")
+    parser.add_argument("--client-secret", default="client_secret")
+    parser.add_argument("--no-validators", action="store_true")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
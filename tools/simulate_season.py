@@ -0,0 +1,200 @@
+"""Time travel simulation of a Tempo season against the RTE API stand-in.
+
+Drives the API worker scheduling (fetch planning, confirmation and
+announcement retries, reconciliations) with a simulated clock jumping from one
+planned fetch to the next, while the stand-in publishes each day color at a
+randomized announcement time (some of them late in the afternoon, some of
+them a day ahead as for week-ends). A whole season is replayed in seconds of
+wall time and reported:
+- the number of token and tempo requests (304 included), the days and bytes
+  transferred
+- the planned fetches by reason
+- the staleness latency: from the RTE publication of a color (or from the
+  start of the day before, if published earlier) to the worker holding it
+
+Usage (from the repository root, with Home Assistant installed):
+    python tools/simulate_season.py [--start 2023-09-01] [--days 365] [--seed 0]
+        [--late-ratio 0.05] [--ahead-ratio 0] [--no-jitter] [--no-validators]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from collections.abc import Callable
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.storage import Store  # noqa: E402
+
+from custom_components.rtetempo import (  # noqa: E402
+    api_client as api_client_module,
+    token_manager as token_manager_module,
+)
+from custom_components.rtetempo.api_worker import APIWorker  # noqa: E402
+from custom_components.rtetempo.const import FRANCE_TZ  # noqa: E402
+from custom_components.rtetempo.fetch_scheduler import FetchScheduler  # noqa: E402
+
+from rte_standin import RTEStandIn  # noqa: E402
+
+
+class SimulatedClock:
+    """Clock shared by the worker and the stand-in, only moving when told to."""
+
+    def __init__(self, start: datetime.datetime) -> None:
+        """Initialize the clock at its start instant."""
+        self.now = start
+
+    def __call__(self) -> datetime.datetime:
+        """Return the simulated current time."""
+        return self.now
+
+
+def announcement_times(
+    rng: random.Random, late_ratio: float, ahead_ratio: float
+) -> Callable[[datetime.date], datetime.datetime]:
+    """Return a publication time generator: 10:30-11:15 the day before, some of them later or a day earlier."""
+    published: dict[datetime.date, datetime.datetime] = {}
+
+    def publication(day: datetime.date) -> datetime.datetime:
+        if day not in published:
+            draw = rng.random()
+            if draw < late_ratio:
+                delay = datetime.timedelta(hours=rng.uniform(2, 8))
+            else:
+                delay = datetime.timedelta(minutes=rng.uniform(0, 45))
+            days_ahead = 2 if draw > 1 - ahead_ratio else 1
+            published[day] = datetime.datetime.combine(
+                day - datetime.timedelta(days=days_ahead),
+                datetime.time(hour=10, minute=30),
+                tzinfo=FRANCE_TZ,
+            ) + delay
+        return published[day]
+
+    return publication
+
+
+def percentile(values: list[float], ratio: float) -> float:
+    """Return a percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+async def async_simulate(args: argparse.Namespace) -> None:
+    """Replay a season and print its report."""
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+    start = datetime.datetime.combine(args.start, datetime.time(tzinfo=FRANCE_TZ))
+    end = start + datetime.timedelta(days=args.days)
+    clock = SimulatedClock(start)
+    publication = announcement_times(rng, args.late_ratio, args.ahead_ratio)
+    standin = RTEStandIn(
+        clock=clock, publication=publication, validators=not args.no_validators
+    )
+    hass = HomeAssistant(tempfile.mkdtemp())
+    hass.config.set_time_zone("Europe/Paris")
+    await hass.async_start()
+    await standin.start()
+    try:
+        with patch.object(
+            token_manager_module, "API_TOKEN_ENDPOINT", standin.token_url
+        ), patch.object(api_client_module, "API_TEMPO_ENDPOINT", standin.tempo_url):
+            worker = APIWorker(
+                hass,
+                Store(hass, 1, "rtetempo.simulation"),
+                clock=clock,
+                scheduler=FetchScheduler(
+                    jitter={} if args.no_jitter else None,
+                    rng=random.Random(args.seed),
+                ),
+            )
+            worker.add_credentials(
+                "simulation", standin.client_id, standin.client_secret
+            )
+            reasons: Counter[str] = Counter()
+            known_at: dict[datetime.date, datetime.datetime] = {}
+            refreshes = 0
+            wall_start = time.perf_counter()
+            while clock.now < end:
+                await worker.async_refresh()
+                refreshes += 1
+                newest_day = worker.tempo_days.newest_day()
+                if newest_day is not None and newest_day not in known_at:
+                    known_at[newest_day] = clock.now
+                plan = worker.scheduler.next_fetch
+                reasons[plan.reason] += 1
+                clock.now = plan.at
+            wall_time = time.perf_counter() - wall_start
+            await worker.async_shutdown()
+    finally:
+        await standin.stop()
+        await hass.async_stop(force=True)
+    # staleness of the days published during the simulation: a color can not be
+    # expected before the start of the day before (next day color)
+    def available(day: datetime.date) -> datetime.datetime:
+        return max(
+            publication(day),
+            datetime.datetime.combine(
+                day - datetime.timedelta(days=1), datetime.time(tzinfo=FRANCE_TZ)
+            ),
+        )
+
+    staleness = [
+        (known - available(day)).total_seconds() / 60
+        for day, known in known_at.items()
+        if start <= available(day) < end
+    ]
+    missed = sum(
+        1
+        for offset in range(1, args.days + 1)
+        if (day := args.start + datetime.timedelta(days=offset)) not in known_at
+        and available(day) < end
+    )
+    print(
+        f"Simulated {args.days} days from {args.start} in {wall_time:.1f} s"
+        f" ({refreshes} refreshes)"
+    )
+    print(f"  token requests      {standin.calls['token']:>10}")
+    print(
+        f"  tempo requests      {standin.calls['tempo']:>10}"
+        f"  ({standin.calls['tempo'] / args.days:.1f} per day)"
+    )
+    print(f"  not modified (304)  {standin.calls['not_modified']:>10}")
+    print(f"  days transferred    {standin.calls['tempo_days']:>10}")
+    print(
+        f"  bytes transferred   {standin.bytes_sent:>10}"
+        f"  ({standin.bytes_sent / args.days / 1024:.1f} KiB per day)"
+    )
+    print("  planned fetches by reason")
+    for reason, count in reasons.most_common():
+        print(f"    {reason:<18}{count:>10}")
+    if staleness:
+        print(
+            f"  staleness (minutes) median {statistics.median(staleness):.1f},"
+            f" p95 {percentile(staleness, 0.95):.1f}, max {max(staleness):.1f}"
+            f" over {len(staleness)} announcements, {missed} never seen before their day"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--start", type=datetime.date.fromisoformat, default=datetime.date(2023, 9, 1)
+    )
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--late-ratio", type=float, default=0.05)
+    parser.add_argument("--ahead-ratio", type=float, default=0.0)
+    parser.add_argument("--no-jitter", action="store_true")
+    parser.add_argument("--no-validators", action="store_true")
+    asyncio.run(async_simulate(parser.parse_args()))